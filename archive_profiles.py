@@ -0,0 +1,20 @@
+"""
+This module copies every profile in the HTML_Profiles directory into a single profile archive, which is much faster to
+load from than hundreds of thousands of small files (see linkedin.profile_archive)
+"""
+
+import os
+from time import time
+
+from linkedin.profile_archive import convert_directory_to_archive
+
+
+if __name__ == "__main__":
+    # Inputs
+    html_dir = os.path.join(os.getcwd(), "Dataset", "HTML_Profiles")
+    archive_dir = os.path.join(os.getcwd(), "Dataset", "Profile_Archive")
+
+    print("Archiving all profiles...")
+    start = time()
+    added = convert_directory_to_archive(html_dir, archive_dir, codec="zlib")
+    print("Archived", added, "new profiles in", time() - start, "seconds")
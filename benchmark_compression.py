@@ -0,0 +1,65 @@
+"""
+This module measures how the compression of profile files affects their size on disk, how long they take to write,
+and how long they take to load (read and decompress, then parse), for every compression and level.
+
+It copies a sample of the profiles in the HTML_Profiles directory into a temporary directory for each setting.
+"""
+
+import os
+import shutil
+import tempfile
+from time import time
+
+from linkedin.html_files import html_filename, html_username, read_html, write_html
+from linkedin.html_profile import HTMLProfile
+
+
+SETTINGS = [("none", None)] + \
+           [("gzip", level) for level in (1, 6, 9)] + \
+           [("lzma", preset) for preset in (0, 3, 6)]
+
+
+def benchmark(htmls, compression, level):
+    """
+    :param htmls: {username: html} of the sample profiles
+    :return: (total bytes, seconds to write, seconds to read, seconds to read and parse)
+    """
+    sample_dir = tempfile.mkdtemp()
+    try:
+        start = time()
+        for username, html in htmls.items():
+            write_html(os.path.join(sample_dir, html_filename(username, compression)), html, compression, level)
+        write_time = time() - start
+
+        paths = [os.path.join(sample_dir, file) for file in os.listdir(sample_dir)]
+        size = sum(os.path.getsize(path) for path in paths)
+
+        start = time()
+        for path in paths:
+            read_html(path)
+        read_time = time() - start
+
+        start = time()
+        for path in paths:
+            HTMLProfile(read_html(path)).pre_cache_all()
+        load_time = time() - start
+    finally:
+        shutil.rmtree(sample_dir)
+
+    return size, write_time, read_time, load_time
+
+
+if __name__ == "__main__":
+    # Inputs
+    html_dir = os.path.join(os.getcwd(), "Dataset", "HTML_Profiles")
+    sample_size = 500
+
+    files = [file for file in sorted(os.listdir(html_dir)) if html_username(file) is not None][:sample_size]
+    htmls = {html_username(file): read_html(os.path.join(html_dir, file)) for file in files}
+    print("Benchmarking", len(htmls), "profiles")
+
+    print("compression  level       MB   write s    read s    load s")
+    for compression, level in SETTINGS:
+        size, write_time, read_time, load_time = benchmark(htmls, compression, level)
+        print("%-11s  %5s  %7.2f  %8.3f  %8.3f  %8.3f" %
+              (compression, level, size / 1024 ** 2, write_time, read_time, load_time))
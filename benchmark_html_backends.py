@@ -0,0 +1,58 @@
+"""
+This module measures how many profiles per second each html backend (see linkedin.html_profile.load_html_profile)
+can parse, and parse and extract every field of, on a sample of the profiles in the HTML_Profiles directory.
+
+It then prints how long each field took to extract on its own, with every backend, to show which extractors dominate.
+"""
+
+import os
+from time import time
+
+from linkedin.html_files import html_username, read_html
+from linkedin.html_profile import HTML_BACKENDS, load_html_profile
+from linkedin.profile_record import ProfileRecord
+from linkedin.profile_utils import enable_cache_stats, print_cache_stats, reset_cache_stats
+
+
+def benchmark(htmls, backend):
+    """
+    :param htmls: A list of the html of the sample profiles
+    :return: (profiles per second parsed, profiles per second parsed and pre-cached)
+    """
+    start = time()
+    for html in htmls:
+        load_html_profile(html, backend)
+    parse_time = time() - start
+
+    start = time()
+    for html in htmls:
+        load_html_profile(html, backend).pre_cache_all()
+    load_time = time() - start
+
+    return len(htmls) / parse_time, len(htmls) / load_time
+
+
+if __name__ == "__main__":
+    # Inputs
+    html_dir = os.path.join(os.getcwd(), "Dataset", "HTML_Profiles")
+    sample_size = 500
+
+    files = [file for file in sorted(os.listdir(html_dir)) if html_username(file) is not None][:sample_size]
+    htmls = [read_html(os.path.join(html_dir, file)) for file in files]
+    print("Benchmarking", len(htmls), "profiles")
+
+    print("backend        parsed/s   loaded/s")
+    for backend in HTML_BACKENDS:
+        parsed_per_second, loaded_per_second = benchmark(htmls, backend)
+        print("%-12s  %9.1f  %9.1f" % (backend, parsed_per_second, loaded_per_second))
+
+    # Read the fields one at a time (instead of pre_cache_all(), which may find them all at once) and time each one
+    enable_cache_stats()
+    for backend in HTML_BACKENDS:
+        print("\nFields of", backend)
+        reset_cache_stats()
+        for html in htmls:
+            profile = load_html_profile(html, backend)
+            for field in ProfileRecord.FIELDS:
+                getattr(profile, field)
+        print_cache_stats()
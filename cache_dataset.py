@@ -1,38 +1,24 @@
 """
-This module loads the entire dataset and saves it into a *.pickle file for later loading (with it being much faster)
+This module loads the entire dataset and saves a snapshot of it for later loading (with it being much faster)
+
+Only the profile files that are new or changed since the last run are parsed, see linkedin.snapshot_manifest
 """
 
 import os
 from time import time
 
-from linkedin.profile_manager import ProfileManager
-
-
-# Inputs
-html_dir = os.path.join(os.getcwd(), "Dataset", "HTML_Profiles")
-json_dir = os.path.join(os.getcwd(), "Dataset", "JSON_Profiles")
-
+from linkedin.snapshot_manifest import update_snapshot
 
-print("Loading all profiles...")
-start = time()
-reader = ProfileManager(html_dir=html_dir, json_dir=json_dir, pre_cache_profiles=True)
-print("Loaded", len(reader), "profiles in", time() - start, "seconds")
 
+if __name__ == "__main__":
+    # Inputs
+    html_dir = os.path.join(os.getcwd(), "Dataset", "HTML_Profiles")
+    json_dir = os.path.join(os.getcwd(), "Dataset", "JSON_Profiles")
 
-# Open all files in the ScrapedProfiles directory, parse, and print them
-start = time()
-print("Processing all profiles...")
-for profile in reader:
-    profile.name
-    profile.name
-    profile.username
-    profile.skills
-    profile.current_company
-    profile.all_companies
-    profile.location
-    profile.connection_count
-    profile.industry
-print("Processed all profiles in", time() - start, "seconds")
 
-# Saving State
-reader.save_state("./cached_dataset.pickle")
\ No newline at end of file
+    print("Updating the snapshot of all profiles...")
+    start = time()
+    stats = update_snapshot("./cached_dataset.snapshot", html_dir=html_dir, json_dir=json_dir,
+                            workers=os.cpu_count())
+    print("Parsed", stats["parsed"], "files, reused", stats["reused"], "files, removed", stats["removed"], "files")
+    print("Saved", stats["profiles"], "profiles in", time() - start, "seconds")
@@ -0,0 +1,47 @@
+"""
+This module checks that every html backend (see linkedin.html_profile.load_html_profile) finds exactly the same fields
+as the BeautifulSoup backend, for every profile in the HTML_Profiles directory.
+"""
+
+import os
+import sys
+
+from linkedin.html_files import html_username, read_html
+from linkedin.html_profile import HTML_BACKENDS, load_html_profile
+from linkedin.profile_record import ProfileRecord
+
+
+def compare_backends(html, backends=HTML_BACKENDS):
+    """
+    :param html: The html of a profile
+    :param backends: The backends to compare. The first is the reference.
+    :return: A list of (backend, field, reference value, backend value) of every field that is different
+    """
+    reference = load_html_profile(html, backends[0])
+    differences = []
+    for backend in backends[1:]:
+        profile = load_html_profile(html, backend)
+        for field in ProfileRecord.FIELDS:
+            expected, found = getattr(reference, field), getattr(profile, field)
+            if expected != found:
+                differences.append((backend, field, expected, found))
+    return differences
+
+
+if __name__ == "__main__":
+    # Inputs
+    html_dir = os.path.join(os.getcwd(), "Dataset", "HTML_Profiles")
+
+    files = [file for file in sorted(os.listdir(html_dir)) if html_username(file) is not None]
+    print("Comparing", list(HTML_BACKENDS), "on", len(files), "profiles")
+
+    failed = 0
+    for file in files:
+        differences = compare_backends(read_html(os.path.join(html_dir, file)))
+        if len(differences):
+            failed += 1
+        for backend, field, expected, found in differences:
+            print("ERROR:", file, backend, field, "was", repr(found), "expected", repr(expected))
+
+    print(len(files) - failed, "of", len(files), "profiles are the same with every backend")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1 @@
+# Lets a plain `pytest` import the linkedin package from the root of the repository, the same as `python -m pytest`
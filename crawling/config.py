@@ -19,7 +19,9 @@ class CrawlerConfig:
 
                         "urls_between_break":  (10, 20),
 
-                        "browser_timeout":     30}
+                        "browser_timeout":     30,
+
+                        "profile_compression": "none"}
 
     def __init__(self):
         self.lock = RLock()
@@ -58,6 +60,15 @@ class CrawlerConfig:
     def browser_timeout(self, value):
         self.__save_to_settings("browser_timeout", value)
 
+    @property
+    def profile_compression(self):
+        """ How new profiles are compressed when they are saved: "none" (the default), "gzip" or "lzma" """
+        return self.__load_from_settings("profile_compression")
+
+    @profile_compression.setter
+    def profile_compression(self, value):
+        self.__save_to_settings("profile_compression", value)
+
     @property
     def websites(self):
         """
@@ -112,4 +123,7 @@ class CrawlerConfig:
 
                 return self.DEFAULT_SETTINGS[key]
 
+        # Settings files from before a setting was added don't have it yet
+        if key not in data:
+            return self.DEFAULT_SETTINGS[key]
         return data[key]
\ No newline at end of file
@@ -23,7 +23,7 @@ class Crawler:
 
         # Controls
         self.profile_manager = profile_manager
-        self.crawled_urls = []
+        self.crawled_urls = set()
         self.profiles_since_break = 0
         self.browser = None
         self.current_agent = None
@@ -39,6 +39,7 @@ class Crawler:
             self._crawl_page(url)
 
         self._close_browser()
+        self.profile_manager.flush()
 
     def _crawl_page(self, url):
         """
@@ -55,7 +56,7 @@ class Crawler:
             print("Tried to crawl the same URL twice in one session", url)
             return
 
-        self.crawled_urls.append(url)
+        self.crawled_urls.add(url)
 
         if self.profiles_since_break > randint(*self.cfg.urls_between_break):
             self._take_break(self.cfg.sleep_random_break,
@@ -68,7 +69,7 @@ class Crawler:
 
             # Check that this profile has not been parsed before
             username = url.split("/in/", 1)[1]
-            if username in self.profile_manager.users:
+            if self.profile_manager.has_user(username):
                 print("Already crawled: ", username)
                 return
 
@@ -259,11 +260,11 @@ if __name__ == "__main__":
             line = line.replace('\n', '')
             website_list.append(line)
 
+    config = CrawlerConfig()
+
     # Open existing profiles
     print("Loading profiles...")
-    profile_manager = ProfileManager(html_dir="../Dataset/HTML_Profiles/")
-
-    config = CrawlerConfig()
+    profile_manager = ProfileManager(html_dir="../Dataset/HTML_Profiles/", compression=config.profile_compression)
 
     # Run the crawler
     print("Starting Crawler...")
@@ -1,5 +1,3 @@
-from collections import Counter
-
 from time import time
 
 from linkedin.feature_creation import create_features
@@ -9,11 +7,9 @@ if __name__ == "__main__":
     # Inputs
     print("Loading all profiles...")
     start = time()
-    reader = ProfileManager(load_pickle="./cached_dataset.pickle", pre_cache_profiles=False)
-    print("Getting all industries")
-    all_industries = [p.industry for p in reader]
-    print("Printing all")
-    print(Counter(all_industries))
+    reader = ProfileManager(load_snapshot="./cached_dataset.snapshot", stream=True)
+    print("Printing all industries")
+    print(reader.industry_distribution())
     # print("Loaded and processed in ", time() - start)
     #
     #
@@ -2,6 +2,7 @@ import pickle
 from collections import Counter
 
 from data_visualisation.matplotlib_utils import reset_plot
+from linkedin.dataset import get_input_counts, get_split
 
 import matplotlib.pyplot as plt
 
@@ -45,18 +46,9 @@ def plot_accuracy_skill_count(predictions, expected_outputs, save_to=None, show_
 
 def plot_skill_distribution(data, save_to=None, show_plot=False):
     # Prep the data
-    num_tests = 10000  # Number of test examples
-    inputs = data["inputs"][:-num_tests]
-    outputs = data["outputs"][:-num_tests]
-
-    avg = 0
-    counts = []
-    for input in inputs:
-        count = input.count(1)
-        avg += count
-        counts.append(count)
-
-    counted = Counter(counts)
+    counts = get_input_counts(data, get_split(data, "train"))
+
+    counted = Counter(counts.tolist())
     num_skills = []
     num_people = []
     for i in range(0, 1000):
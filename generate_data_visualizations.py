@@ -1,24 +1,21 @@
 import os
-import pickle
 
 from data_visualisation.distributions import plot_skill_distribution, plot_accuracy_skill_count
 from data_visualisation.confusion import generate_confusion_matrix, plot_confusion_matrix
 from data_visualisation.tsne import plot_tsne
 from brain import Brain
-
-import numpy as np
+from linkedin.dataset import find_dataset, get_batch, get_labels, get_split, load_dataset
 
 # Choose the folder to analyze
 tests_dir = "test_dir\\dataset_4"
 
 
-dataset_to_load = [pickle_file for pickle_file in os.listdir(tests_dir) if ".pickle" in pickle_file][0]
-dataset_to_load = os.path.join(tests_dir, dataset_to_load)
-data = pickle.load(open(dataset_to_load, "rb"))
+dataset_to_load = find_dataset(tests_dir)
+data = load_dataset(dataset_to_load)
 
 print("Analyzing tests from dataset ", dataset_to_load)
 
-tests_paths = [entry.path for entry in os.scandir(tests_dir) if entry.is_dir()]
+tests_paths = [entry.path for entry in os.scandir(tests_dir) if entry.is_dir() and entry.path != dataset_to_load]
 
 # Clear the results file
 results_path = os.path.join(tests_dir, "results")
@@ -26,9 +23,9 @@ with open(results_path, "w") as results_file:
     results_file.write("")
 
 # Get the test set from the chosen dataset
-test_inputs = data["inputs"][-10000:]
-test_outputs = data["outputs"][-10000:]
-test_outputs = [np.argmax(out) for out in test_outputs]
+test_rows = get_split(data, "test")
+test_inputs, _ = get_batch(data, test_rows)
+test_outputs = get_labels(data, test_rows)
 
 plot_skill_distribution(data, save_to=os.path.join(tests_dir, "skill_distribution"))
 
@@ -0,0 +1,424 @@
+"""
+Helpers for reading the datasets that create_features() generates, regardless of the format they were built in.
+
+A dataset is a dictionary with "inputs", "outputs", "input_lexicon" and "output_lexicon". The inputs and outputs can be
+    - Lists: "inputs" is a list of hot-encoded lists, "outputs" is a list of one-hot encoded lists
+    - Sparse: "inputs" is a scipy.sparse.csr_matrix, "outputs" is a numpy array of output lexicon indices (labels)
+    - Packed: "inputs" is a PackedInputs, "outputs" is a memory-mapped numpy array of labels (see load_packed_dataset)
+
+It may also have "splits", arrays of the sample indices of the train, val and test sets (see make_splits and get_split).
+
+Training and evaluation code should go through these functions so that only one minibatch at a time is ever densified.
+
+Datasets are saved either as a *.pickle of the dictionary, or as a packed dataset directory:
+    header.json       Lexicons, shapes, build parameters, and the list of parts
+    inputs_N.npy      The hot-encoded inputs of a part, with every row bit-packed by np.packbits
+    outputs_N.npy     The labels of a part
+    usernames_N.json  The username of the profile of every sample in a part, and of the profiles that were skipped
+    split_NAME.npy    The sample indices of the permutation and of the train, val, and test splits (see make_splits)
+
+New parts can be appended to a packed dataset without rewriting the existing ones (see append_packed_part).
+"""
+
+import os
+import pickle
+
+import numpy as np
+import ujson as json
+from scipy.sparse import csr_matrix, issparse
+
+from linkedin.lexicon import as_lexicon, lexicon_from_json, lexicon_to_json
+
+HEADER_FILE = "header.json"
+PACKED_FORMAT_VERSION = 1
+
+# Datasets without splits use this many of their last samples as the test set
+LEGACY_TEST_SIZE = 10000
+
+# How many rows are densified at a time while converting a dataset to the packed format
+PACK_BATCH_SIZE = 10000
+
+
+def build_sparse_inputs(hot_indices, num_features):
+    """
+    :param hot_indices: A list where each element is a list of the lexicon indices that are "hot" for one profile
+    :param num_features: The length of the input lexicon
+    :return: A scipy.sparse.csr_matrix of shape (len(hot_indices), num_features) with 1's at every hot index
+    """
+    indptr = np.zeros(len(hot_indices) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in hot_indices], out=indptr[1:])
+
+    indices = np.fromiter((index for row in hot_indices for index in row), dtype=np.int32, count=indptr[-1])
+    values = np.ones(len(indices), dtype=np.uint8)
+    return csr_matrix((values, indices, indptr), shape=(len(hot_indices), num_features))
+
+
+def num_samples(data):
+    """ Returns the number of profiles in the dataset """
+    return data["inputs"].shape[0] if issparse(data["inputs"]) else len(data["inputs"])
+
+
+def get_batch(data, rows):
+    """
+    Get a dense minibatch from the dataset
+    :param data: A dataset, as returned by create_features()
+    :param rows: A slice, or an array of sample indices (such as a part of a split from get_split())
+    :return: (inputs, outputs) where both are 2D numpy arrays. Outputs are one-hot encoded.
+    """
+    inputs = _take(data["inputs"], rows)
+    if issparse(inputs):
+        inputs = inputs.toarray()
+
+    return np.asarray(inputs, dtype=np.float32), get_one_hot_outputs(data, rows)
+
+
+def get_one_hot_outputs(data, rows):
+    """ Returns the one-hot encoded outputs of the rows (a slice or array of indices) as a 2D numpy array """
+    outputs = _take(data["outputs"], rows)
+    if isinstance(outputs, np.ndarray) and outputs.ndim == 1:
+        return np.eye(len(data["output_lexicon"]), dtype=np.float32)[outputs]
+
+    return np.asarray(outputs, dtype=np.float32)
+
+
+def get_labels(data, rows):
+    """ Returns the outputs of the rows (a slice or array of indices) as a numpy array of output lexicon indices """
+    outputs = _take(data["outputs"], rows)
+    if isinstance(outputs, np.ndarray) and outputs.ndim == 1:
+        return outputs
+
+    return np.array([np.argmax(output) for output in outputs], dtype=np.int64)
+
+
+def get_input_counts(data, rows):
+    """ Returns how many inputs are hot for every one of the rows (a slice or array of indices), as a numpy array """
+    inputs = _take(data["inputs"], rows)
+    if issparse(inputs):
+        return np.diff(inputs.indptr)
+    if isinstance(inputs, np.ndarray):
+        return inputs.sum(axis=1, dtype=np.int64)
+
+    return np.array([hot_input.count(1) for hot_input in inputs], dtype=np.int64)
+
+
+def _take(values, rows):
+    """ Index a list, numpy array, csr_matrix or PackedInputs with a slice or an array of indices """
+    if isinstance(rows, slice) or not isinstance(values, list):
+        return values[rows]
+    return [values[row] for row in rows]
+
+
+def make_splits(labels, seed=None, test_size=LEGACY_TEST_SIZE, val_size=0, stratify=False):
+    """
+    Split a dataset into train, validation and test sets by index, so that the samples themselves are never shuffled
+    or copied.
+
+    :param labels: The label of every sample, as returned by get_labels()
+    :param seed: The seed of the permutation. The same seed and labels always give the same splits.
+    :param test_size: The number of test samples, or the fraction of samples if it is a float
+    :param val_size: The number of validation samples, or the fraction of samples if it is a float
+    :param stratify: If True, every label has (as close as possible) the same share of every split
+    :return: {"permutation": A random order of every sample index,
+              "train": ..., "val": ..., "test": ...} where every split is an array of sample indices, in random order
+    """
+    rng = np.random.RandomState(seed)
+    labels = np.asarray(labels)
+    total = len(labels)
+    test_size = int(round(test_size * total)) if isinstance(test_size, float) else min(test_size, total)
+    val_size = int(round(val_size * total)) if isinstance(val_size, float) else min(val_size, total - test_size)
+
+    permutation = rng.permutation(total)
+    if not stratify or total == 0:
+        return {"permutation": permutation,
+                "test": permutation[:test_size],
+                "val": permutation[test_size:test_size + val_size],
+                "train": permutation[test_size + val_size:]}
+
+    # Take the same fraction of every label, walking each label's samples in the order of the permutation
+    splits = {"test": [], "val": [], "train": []}
+    permuted_labels = labels[permutation]
+    for label in np.unique(labels):
+        members = permutation[permuted_labels == label]
+        label_test = int(round(len(members) * test_size / total))
+        label_val = int(round(len(members) * val_size / total))
+        splits["test"].append(members[:label_test])
+        splits["val"].append(members[label_test:label_test + label_val])
+        splits["train"].append(members[label_test + label_val:])
+
+    splits = {name: rng.permutation(np.concatenate(parts)) for name, parts in splits.items()}
+    splits["permutation"] = permutation
+    return splits
+
+
+def get_split(data, name):
+    """
+    :param data: A dataset
+    :param name: "train", "val", or "test"
+    :return: An array of the sample indices in the split. Datasets that were built without splits use their last
+    LEGACY_TEST_SIZE samples as the test set and everything else as the training set.
+    """
+    if data.get("splits") is not None:
+        return data["splits"][name]
+
+    total = num_samples(data)
+    test_start = max(0, total - LEGACY_TEST_SIZE)
+    legacy_splits = {"train": np.arange(0, test_start),
+                     "val": np.arange(0),
+                     "test": np.arange(test_start, total)}
+    return legacy_splits[name]
+
+
+class PackedInputs:
+    """
+    The inputs of a packed dataset. The bit-packed rows are memory-mapped, and are only unpacked when sliced, so
+    opening a dataset doesn't read it into memory.
+
+    Slicing it (inputs[start:end]) returns a dense 2D numpy array of 0's and 1's
+    """
+
+    def __init__(self, part_paths, num_features):
+        """
+        :param part_paths: The *.npy files of packed rows, in order
+        :param num_features: The length of the input lexicon (the number of columns after unpacking)
+        """
+        self.num_features = num_features
+        self._parts = [np.load(path, mmap_mode="r") for path in part_paths]
+        self._offsets = np.cumsum([0] + [len(part) for part in self._parts])
+
+    @property
+    def shape(self):
+        return int(self._offsets[-1]), self.num_features
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1 and len(self._parts) == 1:
+                return self._unpack(self._parts[0][start:stop])
+            key = np.arange(start, stop, step)
+
+        rows = np.asarray(key)
+        if rows.ndim == 0:
+            return self[rows.reshape(1)][0]
+
+        # Gather the packed rows from every part, and only unpack what was asked for
+        rows = np.where(rows < 0, rows + len(self), rows)
+        part_ids = np.searchsorted(self._offsets, rows, side="right") - 1
+        packed = np.empty((len(rows), self._row_bytes), dtype=np.uint8)
+        for part_id in np.unique(part_ids):
+            in_part = part_ids == part_id
+            packed[in_part] = self._parts[part_id][rows[in_part] - self._offsets[part_id]]
+
+        return self._unpack(packed)
+
+    @property
+    def _row_bytes(self):
+        return -(-self.num_features // 8)
+
+    def _unpack(self, packed):
+        return np.unpackbits(packed, axis=1, count=self.num_features)
+
+
+def save_packed_dataset(data, save_to, build_params=None):
+    """
+    Save a dataset in the packed format
+    :param data: A dataset in any format, as returned by create_features()
+    :param save_to: The directory to save the dataset in. It will be created if it doesn't exist.
+    :param build_params: A dictionary of the parameters that the dataset was built with, saved into the header
+    """
+    os.makedirs(save_to, exist_ok=True)
+
+    header = {"format_version": PACKED_FORMAT_VERSION,
+              "input_lexicon": lexicon_to_json(data["input_lexicon"]),
+              "output_lexicon": lexicon_to_json(data["output_lexicon"]),
+              "num_samples": num_samples(data),
+              "num_features": len(data["input_lexicon"]),
+              "num_labels": len(data["output_lexicon"]),
+              "build_params": build_params or {},
+              "parts": [_write_packed_part(save_to, 0, data)]}
+    if data.get("splits") is not None:
+        header["splits"] = _write_packed_splits(save_to, data["splits"])
+    _write_packed_header(save_to, header)
+
+
+def append_packed_part(save_to, data):
+    """
+    Append samples to an existing packed dataset, as a new part. The existing parts are not rewritten.
+    If the dataset has splits, the new samples are added to the end of the permutation and to the training set, so that
+    the validation and test sets stay the same.
+    :param save_to: A packed dataset directory
+    :param data: A dataset (in any format) of the new samples, encoded with the same lexicons as the packed dataset
+    :return: The updated header
+    """
+    header = load_packed_header(save_to)
+    if lexicon_to_json(data["input_lexicon"]) != header["input_lexicon"] or \
+            lexicon_to_json(data["output_lexicon"]) != header["output_lexicon"]:
+        raise ValueError("The appended samples must be encoded with the lexicons of the packed dataset!")
+
+    new_rows = np.arange(header["num_samples"], header["num_samples"] + num_samples(data))
+    header["parts"].append(_write_packed_part(save_to, len(header["parts"]), data))
+    header["num_samples"] += num_samples(data)
+
+    if "splits" in header:
+        splits = {name: np.load(os.path.join(save_to, filename)) for name, filename in header["splits"].items()}
+        splits["permutation"] = np.concatenate([splits["permutation"], new_rows])
+        splits["train"] = np.concatenate([splits["train"], new_rows])
+        header["splits"] = _write_packed_splits(save_to, splits)
+
+    _write_packed_header(save_to, header)
+    return header
+
+
+def _write_packed_part(save_to, part_id, data):
+    """ Writes the inputs, outputs, and usernames of a dataset as part number part_id. Returns the header entry. """
+    total = num_samples(data)
+    num_features = len(data["input_lexicon"])
+    part = {"inputs": "inputs_" + str(part_id) + ".npy",
+            "outputs": "outputs_" + str(part_id) + ".npy",
+            "usernames": "usernames_" + str(part_id) + ".json",
+            "num_samples": total}
+
+    # Write the inputs a batch at a time, so that the whole dataset is never dense in memory
+    packed = np.lib.format.open_memmap(os.path.join(save_to, part["inputs"]), mode="w+",
+                                       dtype=np.uint8, shape=(total, -(-num_features // 8)))
+    for start in range(0, total, PACK_BATCH_SIZE):
+        end = min(start + PACK_BATCH_SIZE, total)
+        inputs = data["inputs"][start:end]
+        inputs = inputs.toarray() if issparse(inputs) else np.asarray(inputs)
+        packed[start:end] = np.packbits(inputs.astype(bool), axis=1)
+    packed.flush()
+    del packed
+
+    np.save(os.path.join(save_to, part["outputs"]), get_labels(data, slice(0, total)))
+
+    with open(os.path.join(save_to, part["usernames"]), "w", encoding="utf-8") as usernames_file:
+        json.dump({"samples": list(data.get("usernames", [])),
+                   "skipped": list(data.get("skipped_usernames", []))}, usernames_file)
+
+    return part
+
+
+def _write_packed_splits(save_to, splits):
+    """ Writes every split as a *.npy file. Returns the header entry. """
+    filenames = {}
+    for name, rows in splits.items():
+        filenames[name] = "split_" + name + ".npy"
+        temp_path = os.path.join(save_to, filenames[name] + ".tmp")
+        with open(temp_path, "wb") as split_file:
+            np.save(split_file, np.asarray(rows, dtype=np.int64))
+        os.replace(temp_path, os.path.join(save_to, filenames[name]))
+
+    return filenames
+
+
+def _write_packed_header(save_to, header):
+    # Replace the header in one step, so that a crash never leaves a header that points to unwritten parts
+    temp_path = os.path.join(save_to, HEADER_FILE + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as header_file:
+        json.dump(header, header_file)
+    os.replace(temp_path, os.path.join(save_to, HEADER_FILE))
+
+
+def load_packed_header(load_from):
+    """ Reads only the header of a packed dataset. This is cheap, even for huge datasets. """
+    with open(os.path.join(load_from, HEADER_FILE), encoding="utf-8") as header_file:
+        header = json.load(header_file)
+
+    if header["format_version"] != PACKED_FORMAT_VERSION:
+        raise ValueError("Unsupported packed dataset version: " + str(header["format_version"]))
+    return header
+
+
+def load_packed_dataset(load_from):
+    """
+    Open a packed dataset. Nothing but the header is read into memory until the inputs or outputs are sliced.
+    :param load_from: A directory that was written by save_packed_dataset()
+    :return: A dataset dictionary, with the additional key "build_params"
+    """
+    header = load_packed_header(load_from)
+    parts = header["parts"]
+    usernames, skipped_usernames = _read_packed_usernames(load_from, header)
+
+    splits = None
+    if "splits" in header:
+        splits = {name: np.load(os.path.join(load_from, filename), mmap_mode="r")
+                  for name, filename in header["splits"].items()}
+
+    outputs = [np.load(os.path.join(load_from, part["outputs"]), mmap_mode="r") for part in parts]
+    if len(outputs) > 1:
+        outputs = np.concatenate(outputs)
+    else:
+        outputs = outputs[0]
+
+    return {"inputs": PackedInputs([os.path.join(load_from, part["inputs"]) for part in parts],
+                                   header["num_features"]),
+            "outputs": outputs,
+            "input_lexicon": lexicon_from_json(header["input_lexicon"]),
+            "output_lexicon": lexicon_from_json(header["output_lexicon"]),
+            "build_params": header["build_params"],
+            "splits": splits,
+            "usernames": usernames,
+            "skipped_usernames": skipped_usernames}
+
+
+def load_packed_usernames(load_from, include_skipped=False):
+    """
+    :param load_from: A packed dataset directory
+    :param include_skipped: Whether to include the usernames of profiles that were left out of the dataset
+    :return: A list of the username of every sample in a packed dataset, in order (followed by the skipped usernames)
+    """
+    usernames, skipped_usernames = _read_packed_usernames(load_from, load_packed_header(load_from))
+    return usernames + skipped_usernames if include_skipped else usernames
+
+
+def _read_packed_usernames(load_from, header):
+    """ Returns (the usernames of every sample, the usernames of the skipped profiles) of a packed dataset """
+    usernames = []
+    skipped_usernames = []
+    for part in header["parts"]:
+        with open(os.path.join(load_from, part["usernames"]), encoding="utf-8") as usernames_file:
+            part_usernames = json.load(usernames_file)
+        usernames += part_usernames["samples"]
+        skipped_usernames += part_usernames["skipped"]
+
+    return usernames, skipped_usernames
+
+
+def is_packed_dataset(path):
+    return os.path.isfile(os.path.join(path, HEADER_FILE))
+
+
+def load_dataset(load_from):
+    """
+    Load a dataset of any format
+    :param load_from: The path to a *.pickle dataset or to a packed dataset directory
+    """
+    if is_packed_dataset(load_from):
+        return load_packed_dataset(load_from)
+
+    return pickle.load(open(load_from, "rb"))
+
+
+def load_lexicons(load_from):
+    """
+    Get only the lexicons of a dataset of any format. For packed datasets, only the header is read.
+    :return: (input_lexicon, output_lexicon)
+    """
+    if is_packed_dataset(load_from):
+        header = load_packed_header(load_from)
+        return lexicon_from_json(header["input_lexicon"]), lexicon_from_json(header["output_lexicon"])
+
+    data = load_dataset(load_from)
+    return as_lexicon(data["input_lexicon"]), as_lexicon(data["output_lexicon"])
+
+
+def find_dataset(directory):
+    """ Returns the path of the first dataset (a *.pickle or a packed dataset directory) found in the directory """
+    for entry in sorted(os.listdir(directory)):
+        path = os.path.join(directory, entry)
+        if ".pickle" in entry or is_packed_dataset(path):
+            return path
+
+    raise FileNotFoundError("No dataset was found in " + directory)
@@ -0,0 +1,157 @@
+"""
+A content-addressed cache of datasets built by create_features().
+
+Every dataset is stored under a fingerprint of the parameters it was built with and of the profiles it was built from
+(the size and modification time of every source file of a ProfileManager, or the usernames of any other iterable of
+profiles). If the profiles change, the fingerprint changes, so a stale dataset is never returned.
+
+The least recently used datasets are deleted when the cache grows larger than its size limit.
+"""
+
+import os
+import pickle
+import shutil
+from hashlib import sha256
+
+import ujson as json
+
+from linkedin.dataset import is_packed_dataset, load_packed_dataset, save_packed_dataset
+
+DEFAULT_MAX_CACHE_BYTES = 20 * 1024 ** 3
+
+
+def profile_set_digest(reader):
+    """
+    :param reader: A ProfileManager, or any iterable of profiles
+    :return: A hex digest of the stats of every source file of a ProfileManager, or of the usernames of every profile
+    """
+    digest = sha256()
+
+    # Every profile of a ProfileManager is loaded from one of its source files, so their stats identify the profiles
+    # without parsing any of them (which is the slow part of streaming them)
+    if hasattr(reader, "source_files"):
+        for path, size, mtime in sorted(reader.source_files()):
+            digest.update((path + "\t" + str(size) + "\t" + str(mtime) + "\n").encode("utf-8"))
+        return digest.hexdigest()
+
+    # Readers that weren't loaded from files (ie, a list of profiles) are only identified by their usernames
+    for username in sorted(str(profile.username) for profile in reader):
+        digest.update(username.encode("utf-8") + b"\n")
+
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(build_params, reader):
+    """
+    :param build_params: A JSON serializable dictionary of the parameters the dataset is built with
+    :param reader: The profiles the dataset is built from
+    :return: The key of the dataset in the cache
+    """
+    params_str = json.dumps(build_params, sort_keys=True)
+    return sha256((params_str + "\n" + profile_set_digest(reader)).encode("utf-8")).hexdigest()
+
+
+class DatasetCache:
+    """ A directory of cached datasets, keyed by dataset_fingerprint() """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_CACHE_BYTES):
+        """
+        :param cache_dir: The directory to keep the datasets in. It will be created if it doesn't exist.
+        :param max_bytes: When the cache grows past this size, the least recently used datasets are deleted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def load(self, key):
+        """
+        :param key: A dataset fingerprint
+        :return: The cached dataset, or None if there is no dataset for this key
+        """
+        pickle_path = self._pickle_path(key)
+        packed_path = self._packed_path(key)
+
+        if os.path.isfile(pickle_path):
+            os.utime(pickle_path)
+            return pickle.load(open(pickle_path, "rb"))
+
+        if is_packed_dataset(packed_path):
+            os.utime(packed_path)
+            return load_packed_dataset(packed_path)
+
+        return None
+
+    def store(self, key, data, save_format="pickle", build_params=None):
+        """
+        Save a dataset under a key, then evict old datasets if the cache is too large. A dataset that is larger than
+        max_bytes on its own is not cached at all.
+        :param save_format: "pickle" or "packed", see create_features()
+        :return: True if the dataset was cached
+        """
+        if save_format == "packed":
+            path = self._packed_path(key)
+            temp_path = path + ".tmp"
+            save_packed_dataset(data, temp_path, build_params)
+        else:
+            path = self._pickle_path(key)
+            temp_path = path + ".tmp"
+            with open(temp_path, "wb") as temp_file:
+                pickle.dump(data, temp_file)
+
+        size = _path_size(temp_path)
+        if size > self.max_bytes:
+            print("ERROR: Not caching dataset", key, "because it is", size, "bytes, and the cache is limited to",
+                  self.max_bytes, "bytes")
+            _remove_path(temp_path)
+            return False
+
+        if save_format == "packed":
+            shutil.rmtree(path, ignore_errors=True)
+        os.replace(temp_path, path)
+
+        self.evict(keep=path)
+        return True
+
+    def evict(self, keep=None):
+        """
+        Delete the least recently used datasets until the cache is no larger than max_bytes
+        :param keep: The path of a dataset to never delete, such as the one that was just stored
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".tmp") or entry.path == keep:
+                continue
+            entries.append((entry.stat().st_mtime, _path_size(entry.path), entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        if keep is not None and os.path.exists(keep):
+            total += _path_size(keep)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+
+            print("Evicting cached dataset", path)
+            _remove_path(path)
+            total -= size
+
+    def _pickle_path(self, key):
+        return os.path.join(self.cache_dir, key + ".pickle")
+
+    def _packed_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+
+def _remove_path(path):
+    """ Delete a file, or a directory and everything in it """
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+def _path_size(path):
+    """ The size of a file, or of every file in a directory """
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
@@ -1,9 +1,20 @@
 import pickle
 import os
 from collections import Counter
-from random import shuffle
+from multiprocessing import Pool
 
-from linkedin.sanitization import clean_feature
+import numpy as np
+import ujson as json
+
+from linkedin.dataset import LEGACY_TEST_SIZE, append_packed_part, build_sparse_inputs, get_labels, \
+    load_packed_header, load_packed_usernames, make_splits, num_samples, save_packed_dataset
+from linkedin.dataset_cache import DEFAULT_MAX_CACHE_BYTES, DatasetCache, dataset_fingerprint
+from linkedin.lexicon import FeatureHasher, Lexicon, as_lexicon, lexicon_from_json
+from linkedin.sanitization import add_normalizations, clean_feature, normalization_store_loaded, \
+    record_normalizations, save_loaded_normalization_cache, stop_recording_normalizations
+
+# The file in a packed dataset directory where append_to_dataset() counts inputs that are not in the lexicon
+UNSEEN_INPUTS_FILE = "unseen_inputs.json"
 
 
 def create_lexicon(all_feature_strings, min_uses):
@@ -16,23 +27,33 @@ def create_lexicon(all_feature_strings, min_uses):
         variable will be a list of EVERY SKILL from EVERY PERSON, INCLUDING DUPLICATES.
         If it's location + skill, same deal. It's every skill and every location, including duplicates.
     :param min_uses: Minimum amount of times that a skill has to exist for it to be added as an input to the network
-    :return: Returns a list of the skills that will actually be used
+    :return: Returns a sorted Lexicon of the skills that will actually be used
     """
 
     # Clean data
     cleaned = [clean_feature(skill) for skill in all_feature_strings]
 
+    return create_lexicon_from_counts(Counter(cleaned), min_uses)
+
+
+def create_lexicon_from_counts(counter, min_uses):
+    """
+    The same as create_lexicon, for when the features have already been cleaned and counted
+
+    :param counter: A Counter of cleaned feature strings
+    :param min_uses: Minimum amount of times that a skill has to exist for it to be added as an input to the network
+    :return: Returns a sorted Lexicon of the skills that will actually be used
+    """
+
     # Get rid of words that are too rare or too common
     keep_words = []
-    counter = Counter(cleaned)
-
     for word in counter.keys():
         if counter[word] > min_uses:
             keep_words.append(word)
 
     no_duplicates = list(set(keep_words))
     no_duplicates.sort()
-    return no_duplicates
+    return Lexicon(no_duplicates)
 
 
 def hot_feature(lexicon, user_features):
@@ -42,21 +63,124 @@ def hot_feature(lexicon, user_features):
     user_features = ["matlab", "lawn care", "nail painting"]
     output: [1, 0, 1]  ([1: has nail painting, 0: does not have management, 1: has matlab)
 
-    :param lexicon: A list of strings with no duplicates, where order matters
+    :param lexicon: A Lexicon (or a list of strings with no duplicates, where order matters)
     :param user_features: A list of strings to find the hot_array relative to the lexicon
     """
+    lexicon = as_lexicon(lexicon)
+    return indices_to_hot(hot_indices(lexicon, user_features), len(lexicon))
+
 
+def hot_indices(lexicon, user_features):
+    """
+    The sparse version of hot_feature. Using the example from hot_feature, the output would be [0, 2]
+
+    :param lexicon: A Lexicon (or a list of strings with no duplicates, where order matters)
+    :param user_features: A list of strings to find the hot indices relative to the lexicon
+    :return: A sorted list of the indices in the lexicon of every feature that the user has
+    """
     # Clean the user features
-    user_features = list(set([clean_feature(feature) for feature in user_features]))
+    user_features = set([clean_feature(feature) for feature in user_features])
 
-    output = [0] * len(lexicon)
-    for feature in user_features:
-        try:
-            output[lexicon.index(feature)] = 1
-        except ValueError: pass
+    return cleaned_hot_indices(lexicon, user_features)
+
+
+def cleaned_hot_indices(lexicon, cleaned_features):
+    """
+    The same as hot_indices, for when the features have already been cleaned with clean_feature()
+
+    :param lexicon: A Lexicon (or a list of strings with no duplicates, where order matters)
+    :param cleaned_features: An iterable of cleaned feature strings
+    :return: A sorted list of the indices in the lexicon of every feature that the user has
+    """
+    lexicon = as_lexicon(lexicon)
+
+    indices = [lexicon.get(feature) for feature in set(cleaned_features)]
+    return sorted(index for index in indices if index is not None)
+
+
+def indices_to_hot(indices, length):
+    """ Turns the output of hot_indices() into the output of hot_feature() """
+    output = [0] * length
+    for index in indices:
+        output[index] = 1
     return output
 
 
+class CleanedFeatures:
+    """ The cleaned input and output features of a single profile, as used by create_features() """
+
+    __slots__ = ("username", "inputs", "outputs", "num_inputs", "num_outputs")
+
+    def __init__(self, inputs, outputs, username=None, input_namespaces=None, input_hasher=None):
+        """
+        :param inputs: A list of the raw input feature strings of a profile, duplicates included
+        :param outputs: A list of the raw output feature strings of a profile, duplicates included
+        :param username: The username of the profile
+        :param input_namespaces: The get_features() name that every input came from. Only needed with an input_hasher.
+        :param input_hasher: If not None, a FeatureHasher that the cleaned inputs are salted for
+        """
+        self.username = username
+        self.inputs = [clean_feature(feature) for feature in inputs]
+        self.outputs = [clean_feature(feature) for feature in outputs]
+
+        if input_hasher is not None:
+            self.inputs = [input_hasher.salt(namespace, feature)
+                           for namespace, feature in zip(input_namespaces, self.inputs)]
+
+        # The raw feature counts are what the min_inputs_per_profile filter in create_features() checks
+        self.num_inputs = len(inputs)
+        self.num_outputs = len(outputs)
+
+
+def extract_cleaned_features(profile, input_features, output_feature=None, input_hasher=None):
+    """
+    :param profile: The profile to get features from
+    :param input_features: A list of any supported strings by get_features()
+    :param output_feature: A string, supported by get_features(). If None, only the inputs are extracted.
+    :param input_hasher: If the inputs will be encoded with a FeatureHasher instead of a Lexicon, the FeatureHasher
+    :return: A CleanedFeatures object for this profile
+    """
+    return CleanedFeatures(*_get_raw_features(profile, input_features, output_feature), input_hasher=input_hasher)
+
+
+def _get_raw_features(profile, input_features, output_feature):
+    """ :return: (input features, output features, username, the namespace of every input feature) """
+    namespaced_inputs = get_namespaced_features(profile, input_features)
+    return ([feature for _, feature in namespaced_inputs],
+            get_features(profile, [] if output_feature is None else [output_feature]),
+            profile.username,
+            [namespace for namespace, _ in namespaced_inputs])
+
+
+def encode_profile(encoder, profile, input_features):
+    """
+    Hot-encode the inputs of a single profile, for example at inference time
+    :param encoder: A Lexicon (or list) or a FeatureHasher
+    :param profile: The profile to encode
+    :param input_features: A list of any supported strings by get_features()
+    :return: A hot-encoded list, as returned by hot_feature()
+    """
+    encoder = as_lexicon(encoder)
+    features = extract_cleaned_features(profile, input_features,
+                                        input_hasher=encoder if isinstance(encoder, FeatureHasher) else None)
+    return indices_to_hot(cleaned_hot_indices(encoder, features.inputs), len(encoder))
+
+
+def stream_hashed_features(reader, input_hasher, input_features):
+    """
+    Hash-encode the inputs of every profile in one streaming pass. Unlike create_features(), nothing needs to be
+    known about the corpus first, and only one profile is held in memory at a time.
+
+    :param reader: The profile reader
+    :param input_hasher: A FeatureHasher
+    :param input_features: A list of any supported strings by get_features()
+    :return: A generator of (username, sorted list of hot bucket indices) for every profile
+    """
+    for profile in reader:
+        features = extract_cleaned_features(profile, input_features, input_hasher=input_hasher)
+        yield profile.username, cleaned_hot_indices(input_hasher, features.inputs)
+
+
 def get_features(profile, feature_list):
     """
     :param profile:
@@ -67,32 +191,41 @@ def get_features(profile, feature_list):
         "all_companies"
     :return: A list of strings of all the features, duplicates included, order doesn't necessarily matter.
     """
+    return [feature for _, feature in get_namespaced_features(profile, feature_list)]
+
+
+def get_namespaced_features(profile, feature_list):
+    """
+    The same as get_features(), but every feature is paired with the name of the feature_list entry it came from
+    :return: A list of (namespace, feature), for example [("skills", "matlab"), ("location", "Greater Seattle Area")]
+    """
     supported_features = ["skills", "current_company", "location", "all_companies", "industry"]
     # Verify that all the features being requested are implemented
     assert all([feature in supported_features for feature in feature_list]),\
             "One of the features you requested does not exist! Supported: " + str(supported_features) + \
             "Your Request:" + str(feature_list)
 
-    features = []
+    namespaced_features = []
     if "skills" in feature_list:
-        features += profile.skills
+        namespaced_features += [("skills", skill) for skill in profile.skills]
 
     if "current_company" in feature_list:
         if profile.current_company is not None:
-            features.append(profile.current_company)
+            namespaced_features.append(("current_company", profile.current_company))
 
     if "location" in feature_list:
         if profile.location is not None:
-            features.append(profile.location)
+            namespaced_features.append(("location", profile.location))
 
     if "all_companies" in feature_list:
-        features += profile.all_companies
+        namespaced_features += [("all_companies", company) for company in profile.all_companies]
 
     if "industry" in feature_list:
         if profile.industry is not None:
-            features.append(profile.industry)
+            namespaced_features.append(("industry", profile.industry))
 
     # Throw errors just in case profile code is faulty
+    features = [feature for _, feature in namespaced_features]
     if not all(isinstance(f, str) for f in features):
         raise TypeError("Found a feature that was not a string!")
     if None in features:
@@ -100,14 +233,24 @@ def get_features(profile, feature_list):
     if [] in features:
         raise TypeError("Found an empty list in features!")
 
-    return features
+    return namespaced_features
 
 
 def create_features(reader, input_features, output_feature,
                     min_inputs_per_profile=1,
                     min_input_samples=None,
                     min_output_samples=None,
-                    save_dir=None):
+                    save_dir=None,
+                    sparse=False,
+                    workers=1,
+                    seed=None,
+                    save_format="pickle",
+                    cache_dir=None,
+                    max_cache_bytes=DEFAULT_MAX_CACHE_BYTES,
+                    input_hasher=None,
+                    test_size=LEGACY_TEST_SIZE,
+                    val_size=0,
+                    stratify=False):
     """
     Returns the train_inputs train_outputs and test_inputs and test_outputs for skills
 
@@ -120,78 +263,312 @@ def create_features(reader, input_features, output_feature,
     :param min_output_samples: The minimum number of times an output must exist in the overall dataset to be included
     as an output in the output vector
     :param save_dir: Where to save the pickle. The filename will be autogenerated
+    :param sparse: If True, the inputs are a scipy.sparse.csr_matrix and the outputs are a numpy array of labels
+    (indices into the output lexicon), instead of lists of 0's and 1's. Use linkedin.dataset to read either format.
+    :param workers: The number of processes to clean and encode the profiles with. The features cleaned in the workers
+    are added to the normalization store of this process (see load_normalization_cache()).
+    :param seed: The seed of the permutation that the train/val/test splits are taken from. For a given seed the
+    output is the same for any number of workers. If None, the splits are random.
+    :param save_format: "pickle" to save the dataset as a *.pickle, or "packed" to save it as a packed dataset
+    directory that can be memory-mapped by linkedin.dataset.load_dataset()
+    :param cache_dir: If not None, a DatasetCache directory. If a dataset was already built there with the same
+    parameters from the same profiles, it is returned instead of being rebuilt. Note that with seed=None, the cached
+    dataset keeps the splits that it was first built with.
+    :param max_cache_bytes: The size limit of the cache_dir
+    :param input_hasher: If not None, a FeatureHasher that encodes the inputs instead of an input lexicon. Then
+    min_input_samples is unused, and "input_lexicon" in the output is the FeatureHasher.
+    :param test_size: The number of samples (or fraction of samples, if a float) in the test split
+    :param val_size: The number of samples (or fraction of samples, if a float) in the validation split
+    :param stratify: If True, the splits are stratified by output label
 
     :return: A json of the following format:
         {
-         "inputs": A list of hot-encoded arrays,
-         "outputs": A list of one-hot encoded arrays,
-         "input_lexicon": The lexicon for inputs,
-         "output_lexicon": The lexicon for outputs
+         "inputs": A list of hot-encoded arrays (or a csr_matrix, if sparse),
+         "outputs": A list of one-hot encoded arrays (or an array of labels, if sparse),
+         "input_lexicon": The Lexicon (or FeatureHasher) for inputs,
+         "output_lexicon": The Lexicon for outputs,
+         "usernames": The username of the profile of every input/output,
+         "skipped_usernames": The usernames of the profiles that were not included in the dataset,
+         "splits": The sample indices of the "permutation", and of the "train", "val" and "test" splits
         }
+    The samples are in the same order as the reader. Use linkedin.dataset.get_split() to get them in a random order.
     """
 
     # Verify that the output is not one of the inputs
     assert output_feature not in input_features, "The output was one of the input!"
+    assert save_format in ["pickle", "packed"], "Unsupported save format: " + str(save_format)
+
+
+    build_params = {"input_features": list(input_features),
+                    "output_feature": output_feature,
+                    "min_inputs_per_profile": min_inputs_per_profile,
+                    "min_input_samples": min_input_samples,
+                    "min_output_samples": min_output_samples,
+                    "seed": seed,
+                    "input_hasher": None if input_hasher is None else input_hasher.to_json(),
+                    "test_size": test_size,
+                    "val_size": val_size,
+                    "stratify": stratify}
+
+    data = None
+    if cache_dir is not None:
+        cache = DatasetCache(cache_dir, max_cache_bytes)
+        cache_key = dataset_fingerprint(dict(build_params, sparse=sparse, save_format=save_format), reader)
+        data = cache.load(cache_key)
+        print("Found cached dataset" if data is not None else "No cached dataset found", cache_key)
+
+    if data is None:
+        data = _build_features(reader, input_features, output_feature,
+                               min_inputs_per_profile, min_input_samples, min_output_samples,
+                               sparse, workers, input_hasher)
+        data["splits"] = make_splits(get_labels(data, slice(None)), seed, test_size, val_size, stratify)
+        save_loaded_normalization_cache()
+        if cache_dir is not None:
+            cache.store(cache_key, data, save_format, build_params)
+
+    if save_dir is not None and save_format == "pickle":
+        filename = make_pickle_name(input_features,
+                                    output_feature,
+                                    min_inputs_per_profile,
+                                    min_input_samples,
+                                    min_output_samples)
+        save_file = os.path.join(save_dir, filename)
+        pickle.dump(data, open(save_file, "wb"))
+
+    if save_dir is not None and save_format == "packed":
+        dirname = make_dataset_name(input_features,
+                                    output_feature,
+                                    min_inputs_per_profile,
+                                    min_input_samples,
+                                    min_output_samples)
+        save_packed_dataset(data, os.path.join(save_dir, dirname), build_params)
 
+    print("Skipped", len(reader) - num_samples(data), "profiles")
+    return data
 
-    # Create a lexicon of all possible inputs, if the user didn't specify one
-    input_strings = []
-    output_strings = []
-    for profile in reader:
-        input_strings += get_features(profile, input_features)
-        output_strings += get_features(profile, [output_feature])
-    input_lexicon = create_lexicon(input_strings, min_input_samples)
-    output_lexicon = create_lexicon(output_strings, min_output_samples)
+
+def _build_features(reader, input_features, output_feature,
+                    min_inputs_per_profile, min_input_samples, min_output_samples,
+                    sparse, workers, input_hasher):
+    """ Builds the dataset for create_features(), without any saving or caching """
+
+    # Extract and clean the features of every profile exactly once. The cleaning is split across the workers, and
+    # each worker counts the features of its own shard so that the counts can be merged for the lexicons.
+    raw_features = [_get_raw_features(profile, input_features, output_feature) for profile in reader]
+
+    extracted = []
+    input_counter = Counter()
+    output_counter = Counter()
+    for features, input_counts, output_counts, normalizations in _map_shards(
+            _clean_shard, raw_features, workers, input_hasher, normalization_store_loaded()):
+        extracted += features
+        input_counter.update(input_counts)
+        output_counter.update(output_counts)
+        add_normalizations(normalizations)
+    del raw_features
+
+    # Hashed inputs don't need a lexicon, every feature already has a bucket
+    if input_hasher is None:
+        input_lexicon = create_lexicon_from_counts(input_counter, min_input_samples)
+    else:
+        input_lexicon = input_hasher
+    output_lexicon = create_lexicon_from_counts(output_counter, min_output_samples)
 
 
     # Generate the input and output corresponding arrays
+    encoded = _map_shards(_encode_shard, extracted, workers,
+                          input_lexicon, output_lexicon, min_inputs_per_profile, len(reader))
+
+    return _assemble_dataset(encoded, input_lexicon, output_lexicon, sparse)
+
+
+def _assemble_dataset(encoded, input_lexicon, output_lexicon, sparse):
+    """
+    :param encoded: The shards returned by _encode_shard
+    :return: A dataset dictionary, as returned by create_features()
+    """
     all_hot_inputs = []
     all_hot_outputs = []
-    shuffled_profiles = [profile for profile in reader]
-    shuffle(shuffled_profiles)
-    for i, profile in enumerate(shuffled_profiles):
-        inputs = get_features(profile, input_features)
-        outputs = get_features(profile, [output_feature])
-        if len(inputs) < min_inputs_per_profile:
+    usernames = []
+    skipped_usernames = []
+    for username, input_indices, output_indices in (encoded_profile for shard in encoded for encoded_profile in shard):
+        if input_indices is None:
+            skipped_usernames.append(username)
             continue
-        if len(outputs) == 0:
+
+        usernames.append(username)
+        if sparse:
+            all_hot_inputs.append(input_indices)
+            all_hot_outputs.append(output_indices[0])
+        else:
+            all_hot_inputs.append(indices_to_hot(input_indices, len(input_lexicon)))
+            all_hot_outputs.append(indices_to_hot(output_indices, len(output_lexicon)))
+
+    if sparse:
+        all_hot_inputs = build_sparse_inputs(all_hot_inputs, len(input_lexicon))
+        all_hot_outputs = np.array(all_hot_outputs, dtype=np.int64)
+
+    return {"inputs": all_hot_inputs, "outputs": all_hot_outputs,
+            "input_lexicon": input_lexicon, "output_lexicon": output_lexicon,
+            "usernames": usernames, "skipped_usernames": skipped_usernames}
+
+
+def append_to_dataset(dataset_dir, reader, workers=1, drift_threshold=0.05):
+    """
+    Encode only the profiles that are not in a packed dataset yet, and append them to it. The profiles are encoded
+    against the existing lexicons with the build parameters saved in the dataset header.
+
+    Because the lexicons are not rebuilt, features that become common after the dataset was built are never inputs.
+    This drift is tracked by counting every cleaned input that is not in the input lexicon. Once the number of these
+    unseen inputs that were used more than min_input_samples times reaches drift_threshold * len(input_lexicon)
+    (that is, a rebuild would grow the lexicon by that fraction) a full rebuild is recommended.
+
+    :param dataset_dir: A packed dataset directory, as created by create_features(save_format="packed")
+    :param reader: The profile reader. Profiles that were already encoded (or skipped) for the dataset are ignored.
+    :param workers: The number of processes to clean and encode the new profiles with. The features cleaned in the
+    workers are added to the normalization store of this process (see load_normalization_cache()).
+    :param drift_threshold: The fraction of the input lexicon size at which to recommend a rebuild
+    :return: A dictionary of the following format:
+        {
+         "appended": The number of samples that were added to the dataset,
+         "drift": The number of common unseen inputs, as a fraction of the input lexicon size,
+         "rebuild_recommended": True if drift >= drift_threshold
+        }
+    """
+    header = load_packed_header(dataset_dir)
+    params = header["build_params"]
+    input_lexicon = lexicon_from_json(header["input_lexicon"])
+    output_lexicon = lexicon_from_json(header["output_lexicon"])
+    input_hasher = input_lexicon if isinstance(input_lexicon, FeatureHasher) else None
+
+    known_usernames = set(load_packed_usernames(dataset_dir, include_skipped=True))
+    new_profiles = [profile for profile in reader if profile.username not in known_usernames]
+    print("Found", len(new_profiles), "new profiles")
+
+    raw_features = [_get_raw_features(profile, params["input_features"], params["output_feature"])
+                    for profile in new_profiles]
+    extracted = []
+    for features, _, _, normalizations in _map_shards(_clean_shard, raw_features, workers, input_hasher,
+                                                      normalization_store_loaded()):
+        extracted += features
+        add_normalizations(normalizations)
+
+    encoded = _map_shards(_encode_shard, extracted, workers,
+                          input_lexicon, output_lexicon, params["min_inputs_per_profile"], len(extracted))
+    data = _assemble_dataset(encoded, input_lexicon, output_lexicon, sparse=True)
+    if len(extracted) > 0:
+        append_packed_part(dataset_dir, data)
+    save_loaded_normalization_cache()
+
+    # Keep count of every input that the lexicon doesn't know about, across every append
+    unseen_path = os.path.join(dataset_dir, UNSEEN_INPUTS_FILE)
+    unseen_counter = Counter()
+    if os.path.isfile(unseen_path):
+        unseen_counter.update(json.load(open(unseen_path, encoding="utf-8")))
+    for features in extracted:
+        unseen_counter.update(feature for feature in features.inputs if feature not in input_lexicon)
+    with open(unseen_path, "w", encoding="utf-8") as unseen_file:
+        json.dump(unseen_counter, unseen_file)
+
+    min_input_samples = params["min_input_samples"] or 0
+    common_unseen = sum(1 for count in unseen_counter.values() if count > min_input_samples)
+    drift = common_unseen / max(1, len(input_lexicon))
+
+    rebuild_recommended = drift >= drift_threshold
+    print("Appended", num_samples(data), "samples.", common_unseen, "common inputs are missing from the lexicon.")
+    if rebuild_recommended:
+        print("The lexicon has drifted", drift, "past the threshold of", drift_threshold, "- a rebuild is recommended")
+
+    return {"appended": num_samples(data), "drift": drift, "rebuild_recommended": rebuild_recommended}
+
+
+def _map_shards(func, items, workers, *args):
+    """
+    Split items into contiguous shards and run func(shard, shard_start, *args) on every shard, in a process pool if
+    there is more than one worker.
+    :return: A list of the results of func for every shard, in the same order as the items
+    """
+    if workers <= 1:
+        return [func(items, 0, *args)]
+
+    shard_size = max(1, -(-len(items) // (workers * 4)))
+    shards = [(items[start:start + shard_size], start) + args for start in range(0, len(items), shard_size)]
+
+    with Pool(workers) as pool:
+        return pool.starmap(func, shards)
+
+
+def _clean_shard(raw_features, shard_start, input_hasher=None, keep_normalizations=False):
+    """
+    Runs in a worker of create_features()
+    :param raw_features: A list of the _get_raw_features() of every profile in the shard
+    :param input_hasher: If not None, the inputs are salted for this FeatureHasher, and are not counted
+    :param keep_normalizations: If True, the strings that were cleaned are returned, to be added to the normalization
+    store of the main process. The worker's own copy of the store is thrown away with the worker.
+    :return: (A list of CleanedFeatures, Counter of the cleaned inputs, Counter of the cleaned outputs,
+    {raw: cleaned} of the strings that were not in the worker's normalization store)
+    """
+    if keep_normalizations:
+        record_normalizations()
+    try:
+        extracted = [CleanedFeatures(*raw, input_hasher=input_hasher) for raw in raw_features]
+    finally:
+        normalizations = stop_recording_normalizations()
+
+    input_counter = Counter()
+    output_counter = Counter()
+    for features in extracted:
+        if input_hasher is None:
+            input_counter.update(features.inputs)
+        output_counter.update(features.outputs)
+
+    return extracted, input_counter, output_counter, normalizations
+
+
+def _encode_shard(extracted, shard_start, input_lexicon, output_lexicon, min_inputs_per_profile, num_profiles):
+    """
+    Runs in a worker of create_features()
+    :param extracted: A list of CleanedFeatures
+    :return: A list of (username, input indices, output indices) for every profile in the shard. The indices are None
+    for profiles that were skipped
+    """
+    encoded = []
+    for i, features in enumerate(extracted, start=shard_start):
+        if features.num_inputs < min_inputs_per_profile:
+            encoded.append((features.username, None, None))
+            continue
+        if features.num_outputs == 0:
+            encoded.append((features.username, None, None))
             continue
 
-        print("Processing I/O for profile", str(i) + "/" + str(len(reader)))
-        hot_input = hot_feature(input_lexicon, inputs)
-        hot_output = hot_feature(output_lexicon, outputs)
+        print("Processing I/O for profile", str(i) + "/" + str(num_profiles))
+        input_indices = cleaned_hot_indices(input_lexicon, features.inputs)
+        output_indices = cleaned_hot_indices(output_lexicon, features.outputs)
 
-        if hot_output.count(1) == 0:
+        if len(output_indices) == 0:
             print("ALL ARE 0 FOR OUTPUT")
+            encoded.append((features.username, None, None))
             continue
-        if hot_input.count(1) < min_inputs_per_profile:
+        if len(input_indices) < min_inputs_per_profile:
             print("NOT ENOUGH INPUTS")
+            encoded.append((features.username, None, None))
             continue
 
-        all_hot_inputs.append(hot_input)
-        all_hot_outputs.append(hot_output)
+        encoded.append((features.username, input_indices, output_indices))
 
-    data = {"inputs": all_hot_inputs, "outputs": all_hot_outputs,
-            "input_lexicon": input_lexicon, "output_lexicon": output_lexicon}
-    if save_dir is not None:
-        filename = make_pickle_name(input_features,
-                                    output_feature,
-                                    min_inputs_per_profile,
-                                    min_input_samples,
-                                    min_output_samples)
-        save_file = os.path.join(save_dir, filename)
-        pickle.dump(data, open(save_file, "wb"))
-
-    print("Skipped", len(reader) - len(all_hot_inputs), "profiles")
-    return data
+    return encoded
 
 
 def make_pickle_name(inputs, output, min_inputs_per, min_input_samples, min_output_samples):
+    return make_dataset_name(inputs, output, min_inputs_per, min_input_samples, min_output_samples) + ".pickle"
+
+
+def make_dataset_name(inputs, output, min_inputs_per, min_input_samples, min_output_samples):
     input_str = '_'.join(inputs)
     return "FROM_" + input_str + "_TO_" + output + \
            "_MININPUTSPER_" + str(min_inputs_per) + \
            "_INPUTSAMPLES_" + str(min_input_samples) + \
-           "_OUTPUTSAMPLES_" + str(min_output_samples) + ".pickle"
+           "_OUTPUTSAMPLES_" + str(min_output_samples)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""
+Reading and writing html profile files, which may be compressed:
+    username.html       Uncompressed
+    username.html.gz    gzip
+    username.html.xz    lzma
+"""
+
+import gzip
+import lzma
+import os
+
+# {compression: file extension}
+HTML_EXTENSIONS = {"none": ".html", "gzip": ".html.gz", "lzma": ".html.xz"}
+
+
+def html_filename(username, compression="none"):
+    """ The name of the file of a profile, when written with this compression """
+    if compression not in HTML_EXTENSIONS:
+        raise ValueError("Unknown compression " + repr(compression) + ", expected one of " + str(list(HTML_EXTENSIONS)))
+    return username + HTML_EXTENSIONS[compression]
+
+
+def html_username(filename):
+    """ Returns the username from the name of a profile file, or None if it isn't an html profile file """
+    for extension in HTML_EXTENSIONS.values():
+        if filename.endswith(extension):
+            return filename[:-len(extension)]
+    return None
+
+
+def read_html(path):
+    """ Returns the html of a profile file, decompressing it if it ends with .gz or .xz """
+    if path.endswith(".gz"):
+        opener = gzip.open
+    elif path.endswith(".xz"):
+        opener = lzma.open
+    else:
+        opener = open
+
+    with opener(path, "rt", encoding="utf8") as html_file:
+        return html_file.read()
+
+
+def write_html(path, html, compression="none", level=None):
+    """
+    Write the html of a profile. The file is written to a temporary file first, so that it is never left half written.
+    :param path: Where to write it, usually a html_filename() in the profiles directory
+    :param html: The html string
+    :param compression: One of HTML_EXTENSIONS
+    :param level: The gzip compresslevel (1-9) or lzma preset (0-9). None uses the library's default.
+    """
+    data = str(html).encode("utf-8")
+    if compression == "gzip":
+        data = gzip.compress(data, compresslevel=9 if level is None else level)
+    elif compression == "lzma":
+        data = lzma.compress(data, preset=level)
+    elif compression != "none":
+        raise ValueError("Unknown compression " + repr(compression) + ", expected one of " + str(list(HTML_EXTENSIONS)))
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as html_file:
+        html_file.write(data)
+    os.replace(temp_path, path)
+
+
+def recompress_directory(html_dir, compression, level=None):
+    """
+    Rewrite every profile file in a directory with a different compression. Each new file is written before the old
+    one is deleted, so an interrupted run can simply be started again.
+    :param html_dir: The directory of html profiles
+    :param compression: The compression to convert to, one of HTML_EXTENSIONS
+    :param level: The gzip compresslevel or lzma preset, see write_html()
+    :return: The number of files that were rewritten
+    """
+    rewritten = 0
+    for file in os.listdir(html_dir):
+        username = html_username(file)
+        if username is None or file == html_filename(username, compression):
+            continue
+
+        old_path = os.path.join(html_dir, file)
+        new_path = os.path.join(html_dir, html_filename(username, compression))
+        write_html(new_path, read_html(old_path), compression, level)
+        os.remove(old_path)
+        rewritten += 1
+
+    return rewritten
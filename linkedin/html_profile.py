@@ -1,6 +1,8 @@
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.element import Tag
 
-from linkedin.profile_utils import cache
+from linkedin.profile_record import ProfileRecord
+from linkedin.profile_utils import cached_field, cached_fields
 
 
 class HTMLProfile:
@@ -9,18 +11,24 @@ class HTMLProfile:
         scraping information from that webpage.
     """
 
-    def __init__(self, html_str):
+    def __init__(self, html_str, strained=False):
         """
         :param html_str: The string of the html file of the persons profile
+        :param strained: If True, only the tags that the properties search for (and everything inside them) are
+        parsed into the soup, and the scripts, styles and the rest of the page are skipped. This is much faster and
+        smaller, and every property returns the same values, but the soup is only those parts of the page.
         """
 
-        self.soup = BeautifulSoup(html_str, "lxml")
+        self.soup = BeautifulSoup(html_str, "lxml", parse_only=_FieldStrainer() if strained else None)
 
     def pre_cache_all(self):
         """
         This will run all functions that can be cached, all at once. This is useful when multithreading the
         loading of many profiles, which saves CPU time down the line
+
+        All the fields are found in a single walk of the html, see extract_all()
         """
+        self.extract_all()
         self.name
         self.username
         self.skills
@@ -30,9 +38,37 @@ class HTMLProfile:
         self.connection_count
         self.industry
 
+    def to_record(self):
+        """
+        Extract every field into a ProfileRecord, which doesn't keep the parsed html alive
+        :return: A ProfileRecord
+        """
+        return ProfileRecord.from_profile(self)
+
+    def extract_all(self):
+        """
+        Fill the cache of every property that isn't cached yet, from a single walk of the html. Each property on its
+        own searches the whole tree, so this is much faster than calling them all one by one. The results are exactly
+        the same as the properties', since the properties go through the same helpers once they found their tags.
+        """
+        if all(field.is_cached(self) for field in cached_fields(HTMLProfile).values()):
+            return
+
+        tags = _find_field_tags(self.soup)
+
+        # The same order as pre_cache_all(), since username prints the name and current_company uses all_companies
+        HTMLProfile.name.fill(self, lambda: _name_from_tags(tags["top_card_name"], tags["name_id"]))
+        HTMLProfile.username.fill(self, lambda: self._username_from_links(tags["canonical_links"]))
+        HTMLProfile.skills.fill(self, lambda: _skills_from_tags(tags["pv_skills"] or tags["skills"]))
+        HTMLProfile.all_companies.fill(self, lambda: _companies_from_tag(tags["positions"]))
+        HTMLProfile.current_company.fill(self, lambda: self._current_company_from_tags(tags["current_positions"],
+                                                                                      tags["headline"]))
+        HTMLProfile.location.fill(self, lambda: _string_or_none(tags["locality"]))
+        HTMLProfile.connection_count.fill(self, lambda: _connections_from_tag(tags["connections"]))
+        HTMLProfile.industry.fill(self, lambda: _industry_from_tags(tags["descriptors"]))
+
     # Parsing Functions (Tested)
-    @property
-    @cache("__name")
+    @cached_field("__name")
     def name(self):
         """
         Finds the name of the Lip holder
@@ -40,20 +76,9 @@ class HTMLProfile:
         :return: string name
         """
 
-        name = self.soup.find(class_="pv-top-card-section__name Sans-26px-black-85%")
-        if name is not None:
-            return name.string
+        return _name_from_tags(self.soup.find(class_=_TOP_CARD_NAME_CLASS), self.soup.find(id="name"))
 
-        name = self.soup.find(id="name")
-        if name is not None:
-            return name.string
-
-        if name is None:
-            return ""
-        return name
-
-    @property
-    @cache("__skills")
+    @cached_field("__skills")
     def skills(self):
         """
         Default: []
@@ -68,52 +93,26 @@ class HTMLProfile:
         if len(skills_html) == 0:
             skills_html = self.soup.find_all(class_="skill")
 
-        skills_array = []
-
-        for skill in skills_html:
-            # Get rid of the "See X+" and "See less" buttons that pop up under skills
-            if "see-more" in skill.get_attribute_list('class'): continue
-            if "see-less" in skill.get_attribute_list('class'): continue
-
-            if skill.find_all(class_="skill see-more"): continue
+        return _skills_from_tags(skills_html)
 
-            sanitized_skill = skill.string.lower()
-            sanitized_skill = sanitized_skill.strip()
-            skills_array.append(sanitized_skill)
-
-        return skills_array
-
-    @property
-    @cache("__username")
+    @cached_field("__username")
     def username(self):
         """ Gets the name of the person from the URL of the page. This is useful for when you need a unique name
          of a person.
          :return: String, unique name"""
 
-        url_links = self.soup.find_all('link', rel="canonical", href=True)
-        if len(url_links) == 0:
-            print("Error loading username: ", self.name)
-            return None
-        profile_url = url_links[0]['href']
-        username = profile_url.split("/in/", 1)[1]
-        return username
+        return self._username_from_links(self.soup.find_all('link', rel="canonical", href=True))
 
-    @property
-    @cache("__location")
+    @cached_field("__location")
     def location(self):
         """
         Where the user lives
         Default: None
         :return: "San Fransisco Bay Area"
         """
-        location_tag = self.soup.find(class_="locality")
-        if location_tag is not None and location_tag.string is not None:
-            return location_tag.string
-
-        return None
+        return _string_or_none(self.soup.find(class_="locality"))
 
-    @property
-    @cache("__current_company")
+    @cached_field("__current_company")
     def current_company(self):
         """
         Gets this persons current company with a ton of spaces at the front and newlines??? Condition later
@@ -126,24 +125,10 @@ class HTMLProfile:
         :return: "current company"
         """
 
-        company_tag = self.soup.find(attrs={"data-section": "currentPositionsDetails"})
-        if company_tag is not None:
-            current_company = company_tag.find(class_="org").string
-            if current_company is not None:
-                return current_company
-
-        companies = self.all_companies
-        if len(companies) != 0 and companies[0] is not None:
-            return companies[0]
-
-        companies = self.soup.find(class_="headline title")
-        if companies is not None and companies.string is not None:
-            return companies.string
+        return self._current_company_from_tags(self.soup.find(attrs={"data-section": "currentPositionsDetails"}),
+                                               self.soup.find(class_="headline title"))
 
-        return None
-
-    @property
-    @cache("__all_companies")
+    @cached_field("__all_companies")
     def all_companies(self):
         """
         Returns all companies in experience section
@@ -152,18 +137,9 @@ class HTMLProfile:
         if no companies found return empty array
         """
 
-        experience_tag = self.soup.find(class_="positions")
-        if experience_tag is None:
-            return []
-        companies_array = []
-
-        for company in experience_tag.find_all(class_="item-subtitle"):
-            companies_array.append(company.string)
-
-        return companies_array
+        return _companies_from_tag(self.soup.find(class_="positions"))
 
-    @property
-    @cache("__connection_count")
+    @cached_field("__connection_count")
     def connection_count(self):
         """
         Get this persons number of LinkedIn Connections
@@ -172,32 +148,225 @@ class HTMLProfile:
             Some profiles have "Influencer" instead of a connection number. These default to None (Currently)
         :return: number
         """
-        conn_tag = self.soup.find(class_="member-connections")
+        return _connections_from_tag(self.soup.find(class_="member-connections"))
 
-        if conn_tag is None:
-            return 0
 
-        cons = 0
-        for string in conn_tag.strings:
-            if string.isdigit():
-                cons = int(string)
-
-            elif string == "500+":
-                cons = 500
-
-        return cons
-
-
-    @property
-    @cache("__industry")
+    @cached_field("__industry")
     def industry(self):
         """
         Default: None
         :return: The industry that the person works in
         """
-        industry_tag = self.soup.find_all("dd", class_="descriptor")
+        return _industry_from_tags(self.soup.find_all("dd", class_="descriptor"))
+
+    # Helpers for the fields that need to call other properties
+    def _username_from_links(self, url_links):
+        if len(url_links) == 0:
+            print("Error loading username: ", self.name)
+            return None
+        profile_url = url_links[0]['href']
+        username = profile_url.split("/in/", 1)[1]
+        return username
+
+    def _current_company_from_tags(self, company_tag, headline_tag):
+        if company_tag is not None:
+            current_company = company_tag.find(class_="org").string
+            if current_company is not None:
+                return current_company
+
+        companies = self.all_companies
+        if len(companies) != 0 and companies[0] is not None:
+            return companies[0]
 
-        if len(industry_tag) == 2 and industry_tag[1].string is not None:
-            return industry_tag[1].string
+        if headline_tag is not None and headline_tag.string is not None:
+            return headline_tag.string
 
-        return None
\ No newline at end of file
+        return None
+
+
+_TOP_CARD_NAME_CLASS = "pv-top-card-section__name Sans-26px-black-85%"
+
+# The classes that the properties search for. Those with spaces only match a tag with exactly those classes.
+_FIELD_CLASSES = {_TOP_CARD_NAME_CLASS, "pv-skill-entity__skill-name", "skill", "locality", "headline title",
+                  "positions", "member-connections"}
+
+
+class _FieldStrainer(SoupStrainer):
+    """
+    Only lets BeautifulSoup create the tags that _find_field_tags() (and the properties) look for. Everything inside
+    those tags is kept, and everything else on the page is skipped.
+    """
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        return _is_field_tag(name, attrs)
+
+    def allow_string_creation(self, string):
+        return False
+
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        # Versions of bs4 before 4.13 call this instead of allow_tag_creation()
+        return _is_field_tag(markup_name, markup_attrs)
+
+
+def _is_field_tag(name, attrs):
+    """
+    :param name: The name of a tag that is being parsed
+    :param attrs: Its attributes, as they are in the html (so multi-valued attributes are not split yet)
+    """
+    if attrs is None:
+        return False
+
+    classes = attrs.get("class", "").split()
+    if len(classes):
+        if " ".join(classes) in _FIELD_CLASSES or any(value in _FIELD_CLASSES for value in classes):
+            return True
+        if name == "dd" and "descriptor" in classes:
+            return True
+
+    if attrs.get("id") == "name" or attrs.get("data-section") == "currentPositionsDetails":
+        return True
+    return name == "link" and "href" in attrs and "canonical" in attrs.get("rel", "").split()
+
+
+def _find_field_tags(soup):
+    """
+    Walk the tree once, and collect every tag that the properties of HTMLProfile search for. The first match of a
+    soup.find() is the first tag in the walk, and the matches of a soup.find_all() are in the order of the walk.
+    :return: {name: tag, or None} for the properties that use find(), {name: [tags]} for those that use find_all()
+    """
+    tags = {"top_card_name": None, "name_id": None, "pv_skills": [], "skills": [], "canonical_links": [],
+            "locality": None, "current_positions": None, "headline": None, "positions": None, "connections": None,
+            "descriptors": []}
+
+    for tag in soup.descendants:
+        if not isinstance(tag, Tag) or not tag.attrs:
+            continue
+        attrs = tag.attrs
+
+        classes = attrs.get("class")
+        if classes is not None:
+            if _matches(classes, _TOP_CARD_NAME_CLASS) and tags["top_card_name"] is None:
+                tags["top_card_name"] = tag
+            if _matches(classes, "pv-skill-entity__skill-name"):
+                tags["pv_skills"].append(tag)
+            if _matches(classes, "skill"):
+                tags["skills"].append(tag)
+            if _matches(classes, "locality") and tags["locality"] is None:
+                tags["locality"] = tag
+            if _matches(classes, "headline title") and tags["headline"] is None:
+                tags["headline"] = tag
+            if _matches(classes, "positions") and tags["positions"] is None:
+                tags["positions"] = tag
+            if _matches(classes, "member-connections") and tags["connections"] is None:
+                tags["connections"] = tag
+            if tag.name == "dd" and _matches(classes, "descriptor"):
+                tags["descriptors"].append(tag)
+
+        if attrs.get("id") == "name" and tags["name_id"] is None:
+            tags["name_id"] = tag
+        if attrs.get("data-section") == "currentPositionsDetails" and tags["current_positions"] is None:
+            tags["current_positions"] = tag
+        if tag.name == "link" and attrs.get("href") is not None and _matches(attrs.get("rel"), "canonical"):
+            tags["canonical_links"].append(tag)
+
+    return tags
+
+
+def _matches(values, value):
+    """
+    The same test BeautifulSoup uses for multi-valued attributes like class and rel: either one of the values, or all
+    of them joined by spaces, is equal to the value
+    """
+    if values is None:
+        return False
+    if isinstance(values, str):
+        return values == value
+    return value in values or " ".join(values) == value
+
+
+def _name_from_tags(top_card_name, name_id):
+    if top_card_name is not None:
+        return top_card_name.string
+
+    if name_id is not None:
+        return name_id.string
+
+    return ""
+
+
+def _skills_from_tags(skills_html):
+    skills_array = []
+
+    for skill in skills_html:
+        # Get rid of the "See X+" and "See less" buttons that pop up under skills
+        if "see-more" in skill.get_attribute_list('class'): continue
+        if "see-less" in skill.get_attribute_list('class'): continue
+
+        if skill.find_all(class_="skill see-more"): continue
+
+        sanitized_skill = skill.string.lower()
+        sanitized_skill = sanitized_skill.strip()
+        skills_array.append(sanitized_skill)
+
+    return skills_array
+
+
+def _string_or_none(tag):
+    if tag is not None and tag.string is not None:
+        return tag.string
+
+    return None
+
+
+def _companies_from_tag(experience_tag):
+    if experience_tag is None:
+        return []
+    companies_array = []
+
+    for company in experience_tag.find_all(class_="item-subtitle"):
+        companies_array.append(company.string)
+
+    return companies_array
+
+
+def _connections_from_tag(conn_tag):
+    if conn_tag is None:
+        return 0
+
+    cons = 0
+    for string in conn_tag.strings:
+        if string.isdigit():
+            cons = int(string)
+
+        elif string == "500+":
+            cons = 500
+
+    return cons
+
+
+def _industry_from_tags(industry_tag):
+    if len(industry_tag) == 2 and industry_tag[1].string is not None:
+        return industry_tag[1].string
+
+    return None
+
+# The parsers that a profile can be loaded with: BeautifulSoup (HTMLProfile), BeautifulSoup with only the tags of the
+# fields (HTMLProfile(strained=True)), or lxml with XPath (LXMLProfile)
+HTML_BACKENDS = ("bs4", "bs4-strained", "lxml")
+
+
+def load_html_profile(html_str, backend="bs4"):
+    """
+    :param html_str: The string of the html file of the persons profile
+    :param backend: One of HTML_BACKENDS. "bs4-strained" and "lxml" are several times faster, and find the same
+    fields.
+    :return: An HTMLProfile or an LXMLProfile
+    """
+    if backend == "bs4":
+        return HTMLProfile(html_str)
+    if backend == "bs4-strained":
+        return HTMLProfile(html_str, strained=True)
+    if backend == "lxml":
+        from linkedin.lxml_profile import LXMLProfile
+        return LXMLProfile(html_str)
+    raise ValueError("Unknown backend " + repr(backend) + ", expected one of " + str(list(HTML_BACKENDS)))
\ No newline at end of file
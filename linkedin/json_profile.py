@@ -1,6 +1,5 @@
-from bs4 import BeautifulSoup
-
-from linkedin.profile_utils import cache
+from linkedin.profile_record import ProfileRecord
+from linkedin.profile_utils import cached_field
 
 
 class JSONProfile:
@@ -29,10 +28,16 @@ class JSONProfile:
         self.connection_count
         self.industry
 
+    def to_record(self):
+        """
+        Extract every field into a ProfileRecord, which doesn't keep the profile dictionary alive
+        :return: A ProfileRecord
+        """
+        return ProfileRecord.from_profile(self)
+
 
     # Parsing Functions (Tested)
-    @property
-    @cache("__name")
+    @cached_field("__name")
     def name(self):
         """
         Default: ""
@@ -44,8 +49,7 @@ class JSONProfile:
             name = self.profile["first-name"] + " " + self.profile["last-name"]
         return name
 
-    @property
-    @cache("__skills")
+    @cached_field("__skills")
     def skills(self):
         """
         :return: ['skill', 'skill', ...]
@@ -56,8 +60,7 @@ class JSONProfile:
 
         return skills
 
-    @property
-    @cache("__username")
+    @cached_field("__username")
     def username(self):
         """
          :return: String, unique name
@@ -73,8 +76,7 @@ class JSONProfile:
 
         return username
 
-    @property
-    @cache("__location")
+    @cached_field("__location")
     def location(self):
         """
         Default: None
@@ -86,8 +88,7 @@ class JSONProfile:
 
         return None
 
-    @property
-    @cache("__current_company")
+    @cached_field("__current_company")
     def current_company(self):
         """
         Gets this persons current company with a ton of spaces at the front and newlines??? Condition later
@@ -111,8 +112,7 @@ class JSONProfile:
 
         return None
 
-    @property
-    @cache("__all_companies")
+    @cached_field("__all_companies")
     def all_companies(self):
         """
         Returns all companies in experience section
@@ -128,8 +128,7 @@ class JSONProfile:
 
         return companies
 
-    @property
-    @cache("__connection_count")
+    @cached_field("__connection_count")
     def connection_count(self):
         """
         Get this persons number of LinkedIn Connections
@@ -145,8 +144,7 @@ class JSONProfile:
 
         return connections
 
-    @property
-    @cache("__industry")
+    @cached_field("__industry")
     def industry(self):
         """
         Get his persons industry/field of work
@@ -0,0 +1,210 @@
+"""
+Reads JSON profile files one profile at a time, so that a multi-GB export never has to be held in memory at once.
+
+Two layouts are supported:
+    - A top-level JSON array of profiles: [{...}, {...}, ...]
+    - JSON-lines: one profile object per line
+"""
+
+import json as std_json
+import re
+
+import ujson as json
+
+# How many characters are read from a file at a time
+READ_CHUNK_SIZE = 2 ** 20
+
+# The most characters a single item of an array may take. An item that is still cut off after this many characters
+# (for example a string that is never closed) is reported as invalid, instead of reading the rest of the file into
+# memory looking for its end.
+MAX_ITEM_CHARS = 2 ** 26
+
+_decoder = std_json.JSONDecoder()
+_WHITESPACE = " \t\r\n"
+_WHITESPACE_BYTES = _WHITESPACE.encode()
+_NUMBER_CHARS = "0123456789.eE+-"
+
+# A decode error this close to the end of the buffer may be caused by the item being cut off there, instead of by
+# invalid JSON. It is longer than any literal or escape (e.g. "false" or "\\u00e9") that can be cut in half.
+_CUT_OFF_MARGIN = 16
+
+# What count_json_objects() removes from an array: complete strings (so that the brackets and commas inside of them
+# are skipped), every byte but brackets and commas, and pairs of brackets with nothing but commas between them
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_NOT_STRUCTURE = bytes(byte for byte in range(256) if byte not in b"[]{},")
+_INNERMOST_BRACKETS = re.compile(rb"[\[{][^\[\]{}]*[\]}]")
+
+
+def iter_json_objects(path):
+    """
+    Yields every object in a JSON array file, or a JSON-lines file, one at a time
+    :param path: The path to the file
+    :raises ValueError: If the file isn't valid. Every object before the error has already been yielded.
+    """
+    with open(path, encoding="utf-8") as file:
+        first = _peek(file)
+        if first == "":
+            return
+
+        if first == "[":
+            yield from _iter_array(file)
+        else:
+            for line_number, line in enumerate(file, 1):
+                if line.strip() == "":
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError as e:
+                    raise ValueError("Line " + str(line_number) + ": " + str(e))
+
+
+def count_json_objects(path):
+    """
+    Counts the objects that iter_json_objects() would yield from a valid file, without decoding them. Only the
+    brackets and commas of an array are looked at, and the lines of a JSON-lines file are only counted.
+    :param path: The path to the file
+    :return: The number of objects in the file
+    """
+    with open(path, encoding="utf-8") as file:
+        first = _peek(file)
+        if first == "":
+            return 0
+
+        if first != "[":
+            return sum(1 for line in file if line.strip() != "")
+
+    with open(path, "rb") as file:
+        return _count_array_items(file)
+
+
+def _count_array_items(file):
+    """
+    Counts the items of the top-level array of a binary file. Every step runs over a whole chunk at once with
+    re.sub() and bytes.translate(), because a Python loop over every string and bracket is slower than decoding.
+    """
+    text = _read_past_whitespace(file, b"")[1:]  # After the opening "["
+    text = _read_past_whitespace(file, text)
+    if text[:1] in (b"", b"]"):
+        return 0
+
+    count = 1
+    open_brackets = b""  # The brackets of the items that were still open at the end of the last chunk
+    cut_string = b""  # The start of a string that was cut off by the end of the last chunk
+    while True:
+        eof = text == b""
+
+        # Outside of the strings there are no quotes, so after removing every complete string, the first quote left
+        # starts a string that is cut off by the end of the chunk
+        text = _STRING.sub(b"", cut_string + text)
+        cut = text.find(b'"')
+        if cut == -1 or eof:
+            cut = len(text)
+        cut_string = text[cut:]
+
+        # Remove the innermost pairs of brackets, and everything between them, until only the brackets that are still
+        # open (and the commas between the items of the top-level array) are left
+        structure = open_brackets + text[:cut].translate(None, _NOT_STRUCTURE)
+        while True:
+            reduced = _INNERMOST_BRACKETS.sub(b"", structure)
+            if len(reduced) == len(structure):
+                break
+            structure = reduced
+
+        still_open = len(structure)
+        for bracket in (b"[", b"{"):
+            position = structure.find(bracket)
+            if position != -1:
+                still_open = min(still_open, position)
+
+        # A closing bracket that isn't part of a pair closes the top-level array
+        array_end = structure.find(b"]", 0, still_open)
+        if array_end != -1:
+            return count + structure.count(b",", 0, array_end)
+        if eof:
+            return count + structure.count(b",", 0, still_open)
+
+        count += structure.count(b",", 0, still_open)
+        open_brackets = structure[still_open:].translate(None, b",")
+        text = file.read(READ_CHUNK_SIZE)
+
+
+def _read_past_whitespace(file, text):
+    """ Strips the whitespace from the start of text, reading more of the file until there is something left """
+    while True:
+        text = text.lstrip(_WHITESPACE_BYTES)
+        if text != b"":
+            return text
+        text = file.read(READ_CHUNK_SIZE)
+        if text == b"":
+            return text
+
+
+def _peek(file):
+    """ Returns the first character of the file that isn't whitespace, leaving the file at the start """
+    while True:
+        char = file.read(1)
+        if char == "" or char not in _WHITESPACE:
+            file.seek(0)
+            return char
+
+
+def _iter_array(file):
+    """ Yields the items of a top-level JSON array, decoding them from a buffer that is refilled as it runs out """
+    buffer = ""
+    position = 0  # Where the next thing to parse starts in the buffer
+    offset = 0  # How many characters of the file came before the buffer, for error messages
+    eof = False
+
+    def fill():
+        nonlocal buffer, position, offset, eof
+        chunk = file.read(READ_CHUNK_SIZE)
+        eof = chunk == ""
+        offset += position
+        buffer = buffer[position:] + chunk
+        position = 0
+        return not eof
+
+    def skip_whitespace():
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer) or not fill():
+                return
+
+    def error(message):
+        return ValueError(message + " at character " + str(offset + position))
+
+    skip_whitespace()
+    position += 1  # The opening "["
+
+    skip_whitespace()
+    if buffer[position:position + 1] == "]":
+        return
+
+    while True:
+        # Decode the next item. If it fails because it is cut off by the end of the buffer, read more and retry
+        while True:
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+                # A number at the end of the buffer (like "-2500." of "-2500.0") might continue in the next chunk
+                if eof or buffer[end:].strip(_NUMBER_CHARS) != "":
+                    break
+            except std_json.JSONDecodeError as e:
+                cut_off = e.msg.startswith("Unterminated string") or e.pos >= len(buffer) - _CUT_OFF_MARGIN
+                if not cut_off or eof:
+                    raise error("Invalid JSON (" + str(e) + ")")
+            if len(buffer) - position > MAX_ITEM_CHARS:
+                raise error("Invalid JSON (an item is longer than " + str(MAX_ITEM_CHARS) + " characters)")
+            fill()
+        position = end
+        yield item
+
+        skip_whitespace()
+        separator = buffer[position:position + 1]
+        if separator == "]":
+            return
+        if separator != ",":
+            raise error("Expected ',' or ']'")
+        position += 1
+        skip_whitespace()
@@ -0,0 +1,143 @@
+from hashlib import blake2b
+
+
+class Lexicon:
+    """
+    An ordered list of unique feature strings, with constant time lookup of the index of each feature.
+
+    It behaves like the sorted list that create_lexicon() used to return (it can be indexed, iterated over, and has a
+    length), but finding the position of a feature is a dictionary lookup instead of a linear list.index() scan.
+    """
+
+    def __init__(self, words=()):
+        """
+        :param words: An iterable of unique strings, in the order they should be indexed
+        """
+        self.words = list(words)
+        self._indices = {word: i for i, word in enumerate(self.words)}
+
+        if len(self._indices) != len(self.words):
+            raise ValueError("A Lexicon can not contain duplicate words!")
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __getitem__(self, index):
+        return self.words[index]
+
+    def __contains__(self, word):
+        return word in self._indices
+
+    def __eq__(self, other):
+        if isinstance(other, Lexicon):
+            return self.words == other.words
+        if isinstance(other, list):
+            return self.words == other
+        return NotImplemented
+
+    def __repr__(self):
+        return "Lexicon(" + repr(self.words) + ")"
+
+    def __getstate__(self):
+        # Only pickle the words, the index is rebuilt when loading
+        return {"words": self.words}
+
+    def __setstate__(self, state):
+        self.__init__(state["words"])
+
+    def index(self, word):
+        """ Same as list.index(), raises a ValueError if the word is not in the lexicon """
+        try:
+            return self._indices[word]
+        except KeyError:
+            raise ValueError(repr(word) + " is not in the lexicon")
+
+    def get(self, word, default=None):
+        """ Returns the index of the word, or default if the word is not in the lexicon """
+        return self._indices.get(word, default)
+
+
+def as_lexicon(lexicon):
+    """
+    Use this when loading a lexicon that might have been saved as a plain list (for example, in older dataset pickles)
+    :param lexicon: A Lexicon, a FeatureHasher, or a list of unique strings
+    :return: A Lexicon (or the FeatureHasher)
+    """
+    if isinstance(lexicon, (Lexicon, FeatureHasher)):
+        return lexicon
+    return Lexicon(lexicon)
+
+
+class FeatureHasher:
+    """
+    An alternative to a Lexicon that doesn't need to see the whole corpus first. Every (cleaned) feature is hashed into
+    one of a fixed number of buckets, so any feature, even one that has never been seen before, has an index.
+
+    Features can be salted by namespace (the get_features() name they came from, such as "skills" or "location"), so
+    that the same string as a skill and as a location land in different buckets.
+
+    It has the same interface as a Lexicon, so it can be used anywhere that a Lexicon of inputs is expected.
+    """
+
+    def __init__(self, num_buckets, salts=None):
+        """
+        :param num_buckets: The number of buckets (the length of the hot-encoded inputs)
+        :param salts: None, or a dictionary of {namespace: salt string}. Namespaces without a salt are not salted.
+        """
+        self.num_buckets = num_buckets
+        self.salts = dict(salts or {})
+
+    def __len__(self):
+        return self.num_buckets
+
+    def __iter__(self):
+        return (self[index] for index in range(self.num_buckets))
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.num_buckets:
+            raise IndexError("Bucket index out of range")
+        return "bucket_" + str(index)
+
+    def __contains__(self, feature):
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, FeatureHasher):
+            return self.num_buckets == other.num_buckets and self.salts == other.salts
+        return NotImplemented
+
+    def __repr__(self):
+        return "FeatureHasher(" + str(self.num_buckets) + ", salts=" + repr(self.salts) + ")"
+
+    def salt(self, namespace, feature):
+        """ Returns the string that is actually hashed for a feature from a namespace """
+        if namespace not in self.salts:
+            return feature
+        return self.salts[namespace] + "\x1f" + feature
+
+    def index(self, feature):
+        """ Returns the bucket of an already salted feature """
+        digest = blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") % self.num_buckets
+
+    def get(self, feature, default=None):
+        return self.index(feature)
+
+    def to_json(self):
+        return {"num_buckets": self.num_buckets, "salts": self.salts}
+
+
+def lexicon_to_json(lexicon):
+    """ Returns a JSON serializable version of a Lexicon or FeatureHasher, for lexicon_from_json() """
+    if isinstance(lexicon, FeatureHasher):
+        return lexicon.to_json()
+    return list(lexicon)
+
+
+def lexicon_from_json(lexicon_json):
+    if isinstance(lexicon_json, dict):
+        return FeatureHasher(lexicon_json["num_buckets"], lexicon_json["salts"])
+    return Lexicon(lexicon_json)
@@ -0,0 +1,231 @@
+from lxml import etree
+
+from linkedin.profile_record import ProfileRecord
+from linkedin.profile_utils import cached_field
+
+
+def _has_class(name):
+    """ An XPath test for an element with this class, the way BeautifulSoup's find(class_=name) matches it """
+    if " " in name:
+        return "normalize-space(@class)='" + name + "'"
+    return "contains(concat(' ', normalize-space(@class), ' '), ' " + name + " ')"
+
+
+# The searches of every field, in the same order as HTMLProfile's properties
+_TOP_CARD_NAME = etree.XPath("(//*[" + _has_class("pv-top-card-section__name Sans-26px-black-85%") + "])[1]")
+_NAME_ID = etree.XPath("(//*[@id='name'])[1]")
+_PV_SKILLS = etree.XPath("//*[" + _has_class("pv-skill-entity__skill-name") + "]")
+_SKILLS = etree.XPath("//*[" + _has_class("skill") + "]")
+_SKILL_SEE_MORE = etree.XPath(".//*[" + _has_class("skill see-more") + "]")
+_CANONICAL_LINKS = etree.XPath("//link[@href][contains(concat(' ', normalize-space(@rel), ' '), ' canonical ')]")
+_LOCALITY = etree.XPath("(//*[" + _has_class("locality") + "])[1]")
+_CURRENT_POSITIONS = etree.XPath("(//*[@data-section='currentPositionsDetails'])[1]")
+_ORG = etree.XPath("(.//*[" + _has_class("org") + "])[1]")
+_HEADLINE = etree.XPath("(//*[" + _has_class("headline title") + "])[1]")
+_POSITIONS = etree.XPath("(//*[" + _has_class("positions") + "])[1]")
+_ITEM_SUBTITLES = etree.XPath(".//*[" + _has_class("item-subtitle") + "]")
+_CONNECTIONS = etree.XPath("(//*[" + _has_class("member-connections") + "])[1]")
+_DESCRIPTORS = etree.XPath("//dd[" + _has_class("descriptor") + "]")
+
+# BeautifulSoup doesn't count anything inside these tags as strings of the page
+_NON_TEXT_TAGS = {"script", "style", "template", "rt", "rp"}
+
+
+class LXMLProfile:
+    """
+        The same fields as HTMLProfile, found with compiled XPath expressions on an lxml tree instead of a
+        BeautifulSoup tree, which is much faster to build. The values are plain strings instead of NavigableStrings.
+    """
+
+    def __init__(self, html_str):
+        """
+        :param html_str: The string of the html file of the persons profile
+        """
+        self.tree = etree.HTML(html_str)
+        if self.tree is None:
+            # lxml returns nothing for an empty document, where BeautifulSoup returns an empty tree
+            self.tree = etree.HTML("<html></html>")
+
+    def __getstate__(self):
+        # lxml trees can't be pickled, so save_state() pickles the html instead
+        state = self.__dict__.copy()
+        state["tree"] = etree.tostring(self.tree, encoding="unicode", method="html")
+        return state
+
+    def __setstate__(self, state):
+        state["tree"] = etree.HTML(state["tree"])
+        self.__dict__.update(state)
+
+    def pre_cache_all(self):
+        """
+        This will run all functions that can be cached, all at once. This is useful when multithreading the
+        loading of many profiles, which saves CPU time down the line
+        """
+        self.name
+        self.username
+        self.skills
+        self.current_company
+        self.all_companies
+        self.location
+        self.connection_count
+        self.industry
+
+    def to_record(self):
+        """
+        Extract every field into a ProfileRecord, which doesn't keep the parsed html alive
+        :return: A ProfileRecord
+        """
+        return ProfileRecord.from_profile(self)
+
+    @cached_field("__name")
+    def name(self):
+        """ See HTMLProfile.name """
+        name = _first(_TOP_CARD_NAME(self.tree))
+        if name is not None:
+            return _string(name)
+
+        name = _first(_NAME_ID(self.tree))
+        if name is not None:
+            return _string(name)
+
+        return ""
+
+    @cached_field("__skills")
+    def skills(self):
+        """ See HTMLProfile.skills """
+        skills_html = _PV_SKILLS(self.tree)
+        if len(skills_html) == 0:
+            skills_html = _SKILLS(self.tree)
+
+        skills_array = []
+
+        for skill in skills_html:
+            # Get rid of the "See X+" and "See less" buttons that pop up under skills
+            classes = skill.get("class", "").split()
+            if "see-more" in classes: continue
+            if "see-less" in classes: continue
+
+            if _SKILL_SEE_MORE(skill): continue
+
+            sanitized_skill = _string(skill).lower()
+            sanitized_skill = sanitized_skill.strip()
+            skills_array.append(sanitized_skill)
+
+        return skills_array
+
+    @cached_field("__username")
+    def username(self):
+        """ See HTMLProfile.username """
+        url_links = _CANONICAL_LINKS(self.tree)
+        if len(url_links) == 0:
+            print("Error loading username: ", self.name)
+            return None
+        profile_url = url_links[0].get("href")
+        username = profile_url.split("/in/", 1)[1]
+        return username
+
+    @cached_field("__location")
+    def location(self):
+        """ See HTMLProfile.location """
+        location_tag = _first(_LOCALITY(self.tree))
+        if location_tag is not None:
+            return _string(location_tag)
+
+        return None
+
+    @cached_field("__current_company")
+    def current_company(self):
+        """ See HTMLProfile.current_company """
+        company_tag = _first(_CURRENT_POSITIONS(self.tree))
+        if company_tag is not None:
+            current_company = _string(_first(_ORG(company_tag)))
+            if current_company is not None:
+                return current_company
+
+        companies = self.all_companies
+        if len(companies) != 0 and companies[0] is not None:
+            return companies[0]
+
+        headline_tag = _first(_HEADLINE(self.tree))
+        if headline_tag is not None:
+            return _string(headline_tag)
+
+        return None
+
+    @cached_field("__all_companies")
+    def all_companies(self):
+        """ See HTMLProfile.all_companies """
+        experience_tag = _first(_POSITIONS(self.tree))
+        if experience_tag is None:
+            return []
+
+        return [_string(company) for company in _ITEM_SUBTITLES(experience_tag)]
+
+    @cached_field("__connection_count")
+    def connection_count(self):
+        """ See HTMLProfile.connection_count """
+        conn_tag = _first(_CONNECTIONS(self.tree))
+
+        if conn_tag is None:
+            return 0
+
+        cons = 0
+        for string in _strings(conn_tag):
+            if string.isdigit():
+                cons = int(string)
+
+            elif string == "500+":
+                cons = 500
+
+        return cons
+
+    @cached_field("__industry")
+    def industry(self):
+        """ See HTMLProfile.industry """
+        industry_tag = _DESCRIPTORS(self.tree)
+
+        if len(industry_tag) == 2:
+            return _string(industry_tag[1])
+
+        return None
+
+
+def _first(elements):
+    return elements[0] if len(elements) else None
+
+
+def _string(element):
+    """
+    The same as BeautifulSoup's Tag.string: if the element has exactly one child, and that child is text (or an
+    element with a .string), that text. Otherwise None.
+    """
+    children = []
+    if element.text:
+        children.append(element.text)
+    for child in element:
+        children.append(child)
+        if child.tail:
+            children.append(child.tail)
+
+    if len(children) != 1:
+        return None
+
+    child = children[0]
+    if isinstance(child, str):
+        return child
+    if child.tag is etree.Comment:
+        return child.text
+    return _string(child)
+
+
+def _strings(element):
+    """ The same as BeautifulSoup's Tag.strings: every piece of text in the element, without comments or scripts """
+    if element.tag in _NON_TEXT_TAGS:
+        return
+    if element.text:
+        yield element.text
+    for child in element:
+        if isinstance(child.tag, str):
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
@@ -0,0 +1,71 @@
+from collections import Counter
+
+
+class ProfileAggregates:
+    """
+    Running totals over a list of profiles: how often every skill, company, industry and location appears, and an
+    inverted index from each (normalized) feature to the ids of the profiles that have it.
+
+    A profile's id is the order it was added in, starting at 0.
+    """
+
+    def __init__(self):
+        self.num_profiles = 0
+        self.skill_counts = Counter()
+        self.company_counts = Counter()  # Of current companies
+        self.industry_counts = Counter()
+        self.location_counts = Counter()
+
+        # The index is built from the raw strings, and only grouped by clean_feature() when it is queried, so that
+        # adding profiles never has to wait for the lemmatizer
+        self._raw_index = {}  # {raw feature: [profile ids]}
+        self._normalized_index = {}  # {clean_feature(raw feature): [raw features]}
+        self._unnormalized = []  # Raw features that aren't in the normalized index yet
+
+    def add(self, profile):
+        """ Add a profile to the totals. Every one of its fields will be extracted. """
+        profile_id = self.num_profiles
+        self.num_profiles += 1
+
+        skills = [str(skill) for skill in profile.skills]
+        companies = [str(company) for company in profile.all_companies if company is not None]
+        current_company = _plain(profile.current_company)
+        industry = _plain(profile.industry)
+        location = _plain(profile.location)
+
+        self.skill_counts.update(skills)
+        self.industry_counts[industry] += 1
+        if current_company is not None:
+            self.company_counts[current_company] += 1
+        if location is not None:
+            self.location_counts[location] += 1
+
+        features = set(skills + companies)
+        features.update(feature for feature in (current_company, industry, location) if feature is not None)
+        for feature in features:
+            profile_ids = self._raw_index.get(feature)
+            if profile_ids is None:
+                profile_ids = self._raw_index[feature] = []
+                self._unnormalized.append(feature)
+            profile_ids.append(profile_id)
+
+    def profile_ids_with(self, feature):
+        """
+        :param feature: A skill, company, industry or location. It is matched after clean_feature().
+        :return: A sorted list of the ids of every profile with that feature
+        """
+        # Imported here so that nltk is only loaded once the index is actually used
+        from linkedin.sanitization import clean_feature
+
+        for raw_feature in self._unnormalized:
+            self._normalized_index.setdefault(clean_feature(raw_feature), []).append(raw_feature)
+        self._unnormalized = []
+
+        profile_ids = set()
+        for raw_feature in self._normalized_index.get(clean_feature(feature), []):
+            profile_ids.update(self._raw_index[raw_feature])
+        return sorted(profile_ids)
+
+
+def _plain(value):
+    return None if value is None else str(value)
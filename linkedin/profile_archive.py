@@ -0,0 +1,182 @@
+"""
+An append-only archive of html profiles, to replace a directory with one small file per profile.
+
+An archive is a directory with two files:
+    profiles.data   Every profile's html, one after another. Each record may be compressed (see CODECS).
+    profiles.index  One line per record: username, offset in profiles.data, length, and codec, separated by tabs
+
+Records are only ever appended. The data is written before its index line, so if writing is interrupted, the archive
+is still valid and only the unfinished record is lost. A line that was cut off is ended before the next one is written,
+and is skipped (with an error) when the index is read.
+"""
+
+import lzma
+import mmap
+import os
+import zlib
+
+from linkedin.html_files import html_username, read_html
+
+DATA_FILE = "profiles.data"
+INDEX_FILE = "profiles.index"
+
+# {codec name: (compress, decompress)}, for bytes
+CODECS = {
+    "none": (bytes, bytes),
+    "zlib": (zlib.compress, zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+class ProfileArchive:
+    """ Random access by username, and fast sequential reads, of the profiles in an archive directory """
+
+    def __init__(self, path, codec="zlib"):
+        """
+        :param path: The archive directory. It is created if it doesn't exist.
+        :param codec: How new records are compressed, one of CODECS. Existing records keep the codec they were
+        written with.
+        """
+        if codec not in CODECS:
+            raise ValueError("Unknown codec " + repr(codec) + ", expected one of " + str(list(CODECS)))
+
+        self.path = path
+        self.codec = codec
+        os.makedirs(path, exist_ok=True)
+        for file in (DATA_FILE, INDEX_FILE):
+            open(os.path.join(path, file), "ab").close()
+
+        self._index = {}  # {username: (offset, length, codec)}
+        self._usernames = []  # In the order they were written
+        self._index_read_to = 0  # How many bytes of the index file have been read
+        self._map = None
+        self._refresh()
+
+    def __len__(self):
+        self._refresh()
+        return len(self._usernames)
+
+    def __contains__(self, username):
+        self._refresh()
+        return username in self._index
+
+    def __iter__(self):
+        """ Yields (username, html) of every profile, in the order they were written (sequentially through the file) """
+        self._refresh()
+        for username in list(self._usernames):
+            yield username, self.read(username)
+
+    @property
+    def usernames(self):
+        self._refresh()
+        return list(self._usernames)
+
+    def source_files(self):
+        """ The paths of the files of this archive """
+        return [os.path.join(self.path, DATA_FILE), os.path.join(self.path, INDEX_FILE)]
+
+    def read(self, username):
+        """
+        :param username: The username of a profile in the archive
+        :return: The html of the profile
+        """
+        if username not in self._index:
+            self._refresh()
+        offset, length, codec = self._index[username]
+
+        if self._map is None or offset + length > len(self._map):
+            self._close_map()
+            with open(os.path.join(self.path, DATA_FILE), "rb") as data_file:
+                self._map = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        decompress = CODECS[codec][1]
+        return decompress(self._map[offset:offset + length]).decode("utf-8")
+
+    def append(self, username, html):
+        """
+        Add a profile to the end of the archive
+        :param username: The username of the profile. It can't already be in the archive.
+        :param html: The html of the profile
+        """
+        if username in self:
+            raise ValueError(repr(username) + " is already in the archive")
+        if "\t" in username or "\n" in username:
+            raise ValueError("Usernames in an archive can't contain tabs or newlines: " + repr(username))
+
+        record = CODECS[self.codec][0](str(html).encode("utf-8"))
+
+        # The memory map can't be open while the file grows on every platform
+        self._close_map()
+        with open(os.path.join(self.path, DATA_FILE), "ab") as data_file:
+            offset = data_file.tell()
+            data_file.write(record)
+        index_line = (username + "\t" + str(offset) + "\t" + str(len(record)) + "\t" +
+                      self.codec + "\n").encode("utf-8")
+        with open(os.path.join(self.path, INDEX_FILE), "a+b") as index_file:
+            # If the last line was cut off, end it first, so that it isn't joined with this one
+            if index_file.tell() > 0:
+                index_file.seek(-1, os.SEEK_END)
+                if index_file.read(1) != b"\n":
+                    index_line = b"\n" + index_line
+            index_file.write(index_line)
+        self._refresh()
+
+    def close(self):
+        self._close_map()
+
+    def _refresh(self):
+        """ Read any index lines that were appended since the last refresh (possibly by another process) """
+        with open(os.path.join(self.path, INDEX_FILE), "rb") as index_file:
+            index_file.seek(self._index_read_to)
+            new_index = index_file.read()
+
+        # Ignore a last line that is still being written
+        complete = new_index.rfind(b"\n") + 1
+        for line in new_index[:complete].decode("utf-8", errors="replace").splitlines():
+            entry = _parse_index_line(line)
+            if entry is None:
+                print("ERROR: Skipping a damaged line of", os.path.join(self.path, INDEX_FILE), repr(line))
+                continue
+
+            username, offset, length, codec = entry
+            if username not in self._index:
+                self._usernames.append(username)
+            self._index[username] = (offset, length, codec)
+        self._index_read_to += complete
+
+    def _close_map(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+def _parse_index_line(line):
+    """ Returns (username, offset, length, codec) of a line of the index, or None if the line was cut off """
+    fields = line.split("\t")
+    if len(fields) != 4 or fields[3] not in CODECS or not fields[1].isdigit() or not fields[2].isdigit():
+        return None
+    return fields[0], int(fields[1]), int(fields[2]), fields[3]
+
+
+def convert_directory_to_archive(html_dir, archive_dir, codec="zlib"):
+    """
+    Copy every html profile in a directory (as written by ProfileManager.write_new_html_profile) into an archive.
+    Profiles that are already in the archive are skipped, so an interrupted conversion can be resumed.
+    :param html_dir: The directory of html profiles (.html, .html.gz or .html.xz). The username of each profile is its
+    filename.
+    :param archive_dir: The archive directory
+    :param codec: How the records are compressed, one of CODECS
+    :return: The number of profiles that were added
+    """
+    archive = ProfileArchive(archive_dir, codec)
+    added = 0
+    for file in sorted(os.listdir(html_dir)):
+        username = html_username(file)
+        if username is None or username in archive:
+            continue
+
+        archive.append(username, read_html(os.path.join(html_dir, file)))
+        added += 1
+
+    archive.close()
+    return added
@@ -1,10 +1,19 @@
 import os
-import ujson as json
 import sys
 import pickle
+from collections import Counter, deque
+from multiprocessing import Pool
 
-from linkedin.html_profile import HTMLProfile
+from linkedin.html_files import HTML_EXTENSIONS, html_filename, html_username, read_html, write_html
 from linkedin.json_profile import JSONProfile
+from linkedin.json_stream import count_json_objects, iter_json_objects
+from linkedin.profile_aggregates import ProfileAggregates
+from linkedin.profile_archive import ProfileArchive
+from linkedin.profile_record import ProfileRecord
+from linkedin.profile_snapshot import iter_snapshot, load_snapshot_header, save_snapshot
+
+# How many new profiles write_new_html_profile() collects before inserting them into the ProfileStore
+STORE_BATCH_SIZE = 100
 
 
 
@@ -20,54 +29,172 @@ class ProfileManager:
     before creating a new one.
     """
 
-    def __init__(self, load_pickle=None, html_dir=None, json_dir=None, pre_cache_profiles=False):
+    def __init__(self, load_pickle=None, html_dir=None, json_dir=None, pre_cache_profiles=False, workers=1,
+                 load_snapshot=None, release_parsed=False, stream=False, read_ahead=64, store=None, archive=None,
+                 compression="none", compression_level=None, backend="bs4"):
         """
         :param load_pickle: A path to a *.pickle file of a previously saved state
-        :param profiles_dir: The location where profiles are stored
+        :param load_snapshot: A path to a snapshot file from save_snapshot(). Its profiles are loaded as ProfileRecords.
+        :param html_dir: The location where html profiles are stored
+        :param json_dir: The location where json profiles are stored
         :param pre_cache_profiles: Whether or not to preprocess profiles during
-        the loading process which is multithreaded, thus potentially saving time later
+        the loading process, thus potentially saving time later
+        :param workers: The number of processes to parse profiles with. If more than one, the profiles are parsed and
+        pre-cached in the workers, and are loaded as ProfileRecords (which only hold the extracted fields).
+        :param release_parsed: If True, every profile is pre-cached and replaced by its ProfileRecord as soon as it is
+        loaded (or written), so that the parsed html or json of each profile can be freed. Use this to hold many
+        profiles at once, when nothing needs the original soup or dictionary.
+        :param stream: If True, the profiles of html_dir, json_dir and load_snapshot are not loaded into memory.
+        Instead, they are read again every time the ProfileManager is iterated over, and freed once the loop moves
+        past them. len() still works, from the number of html files, the snapshot header, and the number of profiles
+        in each json file (which are counted without being decoded, see count_json_objects). The username lookups
+        (has_user, get_profile) only know about profiles held in memory, in the store, or in the archive.
+        :param read_ahead: When streaming with more than one worker, the most files that can be parsed ahead of the
+        profile that is currently being used
+        :param store: A ProfileStore to keep up to date. New profiles from write_new_html_profile() are inserted into
+        it in batches of STORE_BATCH_SIZE (call flush() when done writing), and has_user() and get_profile() also look
+        up the profiles in the store. To read every profile from a store, iterate over the ProfileStore itself.
+        :param archive: A ProfileArchive. Its profiles are loaded (or streamed) after those of html_dir and json_dir,
+        and write_new_html_profile() appends new profiles to it instead of writing files to html_dir. When streaming,
+        get_profile() reads a single profile straight from the archive.
+        :param compression: How write_new_html_profile() compresses new files in html_dir: "none", "gzip" or "lzma".
+        Files of every compression (.html, .html.gz and .html.xz) are always read.
+        :param compression_level: The gzip compresslevel (1-9) or lzma preset (0-9), or None for the default
+        :param backend: What html profiles are parsed with, one of HTML_BACKENDS (see load_html_profile). "lxml"
+        loads LXMLProfiles, which are several times faster but don't have a soup.
         """
 
         self._html_profiles_dir = html_dir
         self._json_profiles_dir = json_dir
+        self._release_parsed = release_parsed
+        self._stream = stream
+        self._workers = workers
+        self._read_ahead = read_ahead
+        self._store = store
+        self._archive = archive
+        self._compression = compression
+        self._compression_level = compression_level
+        self._backend = backend
+        self._unstored_profiles = []  # Profiles that were written, but haven't been inserted into the store yet
 
         self.profiles = []
+        self._source_files = {}  # {path: (size, mtime)} of every file that profiles were loaded from
+        self._profiles_by_username = {}  # {username: the first profile loaded with that username}
+        self._html_filenames = set()  # Every filename in the html directory, so writes don't need to os.listdir()
+        self._json_counts = {}  # {path: number of profiles} of json files, for len() while streaming
+        self._aggregates = ProfileAggregates()  # See _get_aggregates()
+        self._aggregated_in_memory = None  # When streaming, how many profiles were in memory when aggregating
         if load_pickle is not None:
             self._load_state(load_pickle)
 
-        self._load_profiles(pre_cache_profiles)
+        self._snapshot_path = load_snapshot
+        if load_snapshot is not None:
+            self._track_source_file(load_snapshot)
+        self._profile_files = self._list_profile_files()
+        if not stream:
+            if load_snapshot is not None:
+                self._add_profiles(list(iter_snapshot(load_snapshot)))
+            self._load_profiles(pre_cache_profiles)
 
     def __len__(self):
-        return len(self.profiles)
+        if not self._stream:
+            return len(self.profiles)
+
+        count = len(self.profiles)
+        if self._snapshot_path is not None:
+            count += load_snapshot_header(self._snapshot_path)["count"]
+        for path, kind in self._profile_files:
+            if kind == "json" and path not in self._json_counts:
+                self._json_counts[path] = count_json_objects(path)
+            count += self._json_counts[path] if kind == "json" else 1
+        return count
 
     def __iter__(self):
         for profile in self.profiles:
             yield profile
 
+        if not self._stream:
+            return
+
+        if self._snapshot_path is not None:
+            yield from iter_snapshot(self._snapshot_path)
+        for path, kind, profiles in parse_profile_files(self._profile_files, self._workers, self._read_ahead,
+                                                        self._release_parsed, self._backend):
+            loaded = 0
+            for profile in profiles:
+                loaded += 1
+                yield profile
+            if kind == "json":
+                self._json_counts[path] = loaded
 
     @property
     def users(self):
         """ Returns a list of strings of users stored in the ProfileManager"""
-        return [p.username for p in self.profiles]
+        return [p.username for p in self]
+
+    def has_user(self, username):
+        """ Returns True if a profile with this username is stored in the ProfileManager """
+        if username in self._profiles_by_username:
+            return True
+        if self._store is not None and self._store.has_user(username):
+            return True
+        return self._archive is not None and username in self._archive
+
+    def get_profile(self, username):
+        """ Returns the profile with this username, or None if there is none """
+        profile = self._profiles_by_username.get(username)
+        if profile is None and self._store is not None:
+            profile = self._store.get_profile(username)
+        if profile is None and self._archive is not None and username in self._archive:
+            # Only this profile is read from the archive, through its index
+            from linkedin.html_profile import load_html_profile
+            profile = load_html_profile(self._archive.read(username), self._backend)
+            if self._release_parsed:
+                profile = profile.to_record()
+        return profile
 
     @property
     def skills(self):
         """ Returns all skills from all users, with duplicates, without order """
-        skills = []
-        for profile in self.profiles:
-            skills += profile.skills
-
-        return skills
+        return list(self._get_aggregates().skill_counts.elements())
 
     @property
     def current_companies(self):
         """ Returns all current companies from all users, with duplicates, without order"""
-        current_companies = []
-        for profile in self.profiles:
-            if profile.current_company is not None:
-                current_companies.append(profile.current_company)
+        return list(self._get_aggregates().company_counts.elements())
+
+    def top_skills(self, n=None):
+        """ Returns [(skill, number of profiles with it), ...] of the n most common skills, or of every skill """
+        return self._get_aggregates().skill_counts.most_common(n)
+
+    def top_companies(self, n=None):
+        """ Returns [(company, number of profiles with it), ...] of the n most common current companies """
+        return self._get_aggregates().company_counts.most_common(n)
+
+    def industry_distribution(self):
+        """ Returns a Counter of {industry: number of profiles}. Profiles without an industry are counted under None """
+        return Counter(self._get_aggregates().industry_counts)
+
+    def location_distribution(self):
+        """ Returns a Counter of {location: number of profiles}, of the profiles with a location """
+        return Counter(self._get_aggregates().location_counts)
+
+    def profiles_with(self, feature):
+        """
+        :param feature: A skill, company, industry or location. It's matched after clean_feature(), so "Data Bases"
+        matches "database".
+        :return: A list of every profile with that feature, in the order of the ProfileManager
+        """
+        profile_ids = self._get_aggregates().profile_ids_with(feature)
+        if not self._stream:
+            return [self.profiles[profile_id] for profile_id in profile_ids]
+
+        profile_ids = set(profile_ids)
+        return [profile for profile_id, profile in enumerate(self) if profile_id in profile_ids]
 
-        return current_companies
+    def source_files(self):
+        """ Returns a list of (path, size in bytes, modification time in ns) of every file profiles were loaded from """
+        return [(path, size, mtime) for path, (size, mtime) in self._source_files.items()]
 
     def save_state(self, save_to):
         """
@@ -77,50 +204,102 @@ class ProfileManager:
         sys.setrecursionlimit(15000)  # Pickling BeautifulSoup objects is very recursion heavy
         pickle.dump(self.profiles, open(save_to, "wb"))
 
+    def save_snapshot(self, save_to):
+        """
+        Save only the extracted fields of every profile, which is much smaller and faster to load than save_state()
+        :param save_to: the path to where to save it
+        """
+        save_snapshot(self, save_to)
+
     def write_new_html_profile(self, html):
         """ This will check that there is no existing profile for this html and then write it if it is new """
-        profile = HTMLProfile(html)
+        from linkedin.html_profile import load_html_profile
+        profile = load_html_profile(html, self._backend)
 
-        if profile.username in self.users:
+        if self.has_user(profile.username):
             print("ERROR: Tried to add", profile.username, "when it was already scraped!")
             return
 
-        # Write to file
-        write_to = os.path.join(self._html_profiles_dir, profile.username + ".html")
-        if write_to in os.listdir(self._html_profiles_dir):
-            print("ERROR: A filename of the same name already existed!", write_to)
-            return
-
-        with open(write_to, "wb") as new_file:
-            new_file.write(str(html).encode("utf-8"))
+        if self._archive is not None:
+            if profile.username in self._archive:
+                print("ERROR: The archive already has a profile of the same name!", profile.username)
+                return
+            self._archive.append(profile.username, html)
+            for path in self._archive.source_files():
+                self._track_source_file(path)
+        else:
+            # Write to file
+            filename = html_filename(profile.username, self._compression)
+            write_to = os.path.join(self._html_profiles_dir, filename)
+            for compression in HTML_EXTENSIONS:
+                if html_filename(profile.username, compression) in self._html_filenames:
+                    print("ERROR: A filename of the same name already existed!", write_to)
+                    return
+
+            write_html(write_to, html, self._compression, self._compression_level)
+            self._html_filenames.add(filename)
+            self._track_source_file(write_to)
+
+        if self._release_parsed:
+            profile = profile.to_record()
+        self._add_profiles([profile])
+
+        if self._store is not None:
+            self._unstored_profiles.append(profile)
+            if len(self._unstored_profiles) >= STORE_BATCH_SIZE:
+                self.flush()
+
+    def flush(self):
+        """ Insert any profiles written by write_new_html_profile() that haven't been inserted into the store yet """
+        if self._store is not None and len(self._unstored_profiles):
+            self._store.add_profiles(self._unstored_profiles)
+        self._unstored_profiles = []
+
+    def _get_aggregates(self):
+        """
+        Bring the aggregates up to date and return them. Only the profiles added since the last call are counted, so
+        this is instant unless many profiles were just loaded.
 
-        self.profiles.append(profile)
+        When streaming, every profile is read once, and again only if profiles have been added since.
+        """
+        if not self._stream:
+            for profile in self.profiles[self._aggregates.num_profiles:]:
+                self._aggregates.add(profile)
+            return self._aggregates
+
+        if self._aggregated_in_memory != len(self.profiles):
+            self._aggregates = ProfileAggregates()
+            self._aggregated_in_memory = len(self.profiles)
+            for profile in self:
+                self._aggregates.add(profile)
+        return self._aggregates
+
+    def _add_profiles(self, profiles):
+        """ Add profiles (any iterable of them) to self.profiles, and index them by username """
+        for profile in profiles:
+            self._profiles_by_username.setdefault(profile.username, profile)
+            self.profiles.append(profile)
+
+    def _list_profile_files(self):
+        """ Returns a list of (path, kind) of every profile file, and of every profile in the archive """
+        profile_files = list_profile_files(self._html_profiles_dir, self._json_profiles_dir)
+
+        for path, kind in profile_files:
+            self._track_source_file(path)
+            if kind == "html":
+                self._html_filenames.add(os.path.basename(path))
+
+        if self._archive is not None:
+            for path in self._archive.source_files():
+                self._track_source_file(path)
+            profile_files += [((self._archive.path, username), "archive") for username in self._archive.usernames]
+        return profile_files
 
     def _load_profiles(self, pre_cache_profiles):
         """Load all profile in the profiles directory"""
-
-        # Load all html profiles
-        if self._html_profiles_dir is not None:
-            for file in os.listdir(self._html_profiles_dir):
-                profile_path = os.path.join(self._html_profiles_dir, file)
-                with open(profile_path, encoding='utf8') as html_file:
-                    html_str = html_file.read()
-                self.profiles.append(HTMLProfile(html_str))
-
-        # Load all the JSON profiles
-        if self._json_profiles_dir is not None:
-            for file in os.listdir(self._json_profiles_dir):
-                json_path = os.path.join(self._json_profiles_dir, file)
-
-                with open(json_path, encoding="utf-8") as file:
-                    try:
-                        file_str = file.read()
-                        profile_jsons = json.loads(file_str)
-
-                    except ValueError as e:
-                        print("Failed to load: ", json_path)
-                parsed_profiles = [JSONProfile(parsed) for parsed in profile_jsons]
-                self.profiles += parsed_profiles
+        for path, kind, profiles in parse_profile_files(self._profile_files, self._workers, self._read_ahead,
+                                                        self._release_parsed, self._backend):
+            self._add_profiles(profiles)
 
         if pre_cache_profiles:
             print("Pre-caching Profiles")
@@ -128,9 +307,102 @@ class ProfileManager:
                 profile.pre_cache_all()
         return
 
+    def _track_source_file(self, path):
+        stat = os.stat(path)
+        self._source_files[path] = (stat.st_size, stat.st_mtime_ns)
 
     def _load_state(self, load_from):
         """ Load a *.pickle of self.profiles """
-        self.profiles = pickle.load(open(load_from, "rb"))
+        self._add_profiles(pickle.load(open(load_from, "rb")))
+        self._track_source_file(load_from)
+
+
+def list_profile_files(html_dir=None, json_dir=None):
+    """ Returns a list of (path, "html" or "json") of every file in the profile directories, html files first """
+    profile_files = []
+    if html_dir is not None:
+        profile_files += [(os.path.join(html_dir, file), "html") for file in os.listdir(html_dir)
+                          if html_username(file) is not None]
+    if json_dir is not None:
+        profile_files += [(os.path.join(json_dir, file), "json") for file in os.listdir(json_dir)]
+    return profile_files
+
+
+def parse_profile_files(profile_files, workers=1, read_ahead=64, to_records=False, backend="bs4"):
+    """
+    Yields (path, kind, profiles) of every profile file, in the same order as profile_files. The profiles of a json
+    file may be an iterator that reads the file as it goes, so use them up before moving on to the next file.
+    :param profile_files: A list of (path, "html" or "json")
+    :param workers: The number of processes to parse the files with. Workers always return ProfileRecords.
+    :param read_ahead: When using more than one worker, the most files that can be parsed ahead of the one being used
+    :param to_records: If True, ProfileRecords are returned even when parsing in this process
+    :param backend: What html profiles are parsed with, see load_html_profile()
+    """
+    if workers <= 1:
+        for path, kind in profile_files:
+            profiles = _parse_profile_file(path, kind, backend)
+            if to_records:
+                profiles = (profile.to_record() for profile in profiles)
+            yield path, kind, profiles
+        return
+
+    # Parse files in a process pool. Workers send back ProfileRecords, since parsed html can't be sent cheaply.
+    # Only read_ahead files are parsed ahead of the one being used, so streaming doesn't fill up memory.
+    with Pool(workers) as pool:
+        pending = deque()
+        for profile_file in profile_files:
+            pending.append(pool.apply_async(_load_profile_records, (profile_file, backend)))
+            if len(pending) >= read_ahead:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+# The archives that _parse_profile_file() has read from in this process, by path
+_open_archives = {}
 
 
+def _parse_profile_file(path, kind, backend="bs4"):
+    """
+    :param path: The path to an html profile, or to a json file of a list of profiles, or for an archived profile,
+    (the archive directory, username)
+    :param kind: "html", "json" or "archive"
+    :param backend: What html profiles are parsed with, see load_html_profile()
+    :return: A list of HTMLProfiles (or LXMLProfiles), or an iterator of JSONProfiles (so that large json files are
+    read incrementally)
+    """
+    if kind == "html":
+        # Imported here so that loading snapshots or json profiles doesn't need bs4
+        from linkedin.html_profile import load_html_profile
+        return [load_html_profile(read_html(path), backend)]
+
+    if kind == "archive":
+        from linkedin.html_profile import load_html_profile
+        archive_path, username = path
+        if archive_path not in _open_archives:
+            _open_archives[archive_path] = ProfileArchive(archive_path)
+        return [load_html_profile(_open_archives[archive_path].read(username), backend)]
+
+    return _iter_json_profiles(path)
+
+
+def _iter_json_profiles(path):
+    """ Yields the JSONProfiles of a json file one at a time. If the file is invalid, it stops at the error. """
+    loaded = 0
+    try:
+        for parsed in iter_json_objects(path):
+            yield JSONProfile(parsed)
+            loaded += 1
+    except ValueError as e:
+        print("ERROR: Failed to load", path, "after", loaded, "profiles:", e)
+
+
+def _load_profile_records(profile_file, backend="bs4"):
+    """
+    Runs in a worker of ProfileManager. Parses a file and extracts every field of its profiles.
+    :param profile_file: (path, kind), see _parse_profile_file
+    :param backend: What html profiles are parsed with, see load_html_profile()
+    :return: (path, kind, a list of ProfileRecords)
+    """
+    path, kind = profile_file
+    return path, kind, [ProfileRecord.from_profile(profile) for profile in _parse_profile_file(path, kind, backend)]
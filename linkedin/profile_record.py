@@ -0,0 +1,57 @@
+class ProfileRecord:
+    """
+        A lightweight profile that only holds the fields that were already extracted from an HTMLProfile or a
+        JSONProfile. It has the same properties as those classes, but no parsed html or json behind them.
+
+        This is what is passed between processes and saved to disk, since it is a tiny fraction of the size of a
+        BeautifulSoup tree.
+    """
+
+    FIELDS = ("name", "username", "skills", "current_company", "all_companies",
+              "location", "connection_count", "industry")
+
+    # No per-instance __dict__, since millions of these might be held at once
+    __slots__ = FIELDS
+
+    def __init__(self, name="", username=None, skills=None, current_company=None, all_companies=None,
+                 location=None, connection_count=0, industry=None):
+        self.name = name
+        self.username = username
+        self.skills = skills if skills is not None else []
+        self.current_company = current_company
+        self.all_companies = all_companies if all_companies is not None else []
+        self.location = location
+        self.connection_count = connection_count
+        self.industry = industry
+
+    def __repr__(self):
+        return "ProfileRecord(" + repr(self.username) + ")"
+
+    @classmethod
+    def from_profile(cls, profile):
+        """
+        Run every extractor of an HTMLProfile or JSONProfile (or copy another ProfileRecord)
+        :param profile: Any object with the properties in ProfileRecord.FIELDS
+        :return: A ProfileRecord
+        """
+        # Profiles can extract all their fields at once (see HTMLProfile.extract_all()), which is faster than reading
+        # them one at a time
+        if hasattr(profile, "pre_cache_all"):
+            profile.pre_cache_all()
+        return cls(**{field: _plain(getattr(profile, field)) for field in cls.FIELDS})
+
+    def pre_cache_all(self):
+        """ Every field of a ProfileRecord is already extracted, so there is nothing to cache """
+        pass
+
+
+def _plain(value):
+    """
+    BeautifulSoup returns NavigableStrings, which keep a reference to their whole tree. This turns them (or lists of
+    them) back into plain strings, so that a record never keeps a tree alive or drags one along when it's pickled.
+    """
+    if isinstance(value, str):
+        return str(value)
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+    return value
@@ -0,0 +1,124 @@
+"""
+A compact snapshot of profiles, storing only the fields that were extracted from them (see ProfileRecord.FIELDS).
+
+Unlike ProfileManager.save_state(), which pickles every HTMLProfile along with its whole BeautifulSoup tree, a snapshot
+never contains a soup, and loading one doesn't import bs4.
+
+A snapshot is a stream of pickles:
+    header    {"format_version", "fields"}
+    chunks    Up to SNAPSHOT_CHUNK_SIZE profiles each, stored column by column as {field: [value, value, ...]}
+    trailer   {"count"}, the number of profiles that were written
+followed by the offset of the trailer in the file, as an 8 byte little-endian integer. The count is written last, so
+that it is always the number of profiles that are actually in the snapshot, even if the profiles being saved ended
+early (for example a streamed json file with an invalid profile). Version 1 snapshots, which have the count in the
+header and no trailer, can still be loaded.
+
+Repeated strings within a chunk (industries, locations, companies, skills) are stored once and shared when loading.
+"""
+
+import os
+import pickle
+import struct
+
+from linkedin.profile_record import ProfileRecord
+
+SNAPSHOT_FORMAT_VERSION = 2
+_READABLE_VERSIONS = (1, 2)
+_TRAILER_OFFSET = struct.Struct("<Q")
+SNAPSHOT_CHUNK_SIZE = 10000
+
+
+def save_snapshot(profiles, save_to):
+    """
+    :param profiles: A ProfileManager, or any iterable of HTMLProfiles, JSONProfiles or ProfileRecords
+    :param save_to: The path of the snapshot file
+    """
+    fields = ProfileRecord.FIELDS
+    header = {"format_version": SNAPSHOT_FORMAT_VERSION, "fields": fields}
+
+    temp_path = save_to + ".tmp"
+    with open(temp_path, "wb") as snapshot_file:
+        pickle.dump(header, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+        count = 0
+        chunk = []
+        for profile in profiles:
+            chunk.append(profile)
+            count += 1
+            if len(chunk) == SNAPSHOT_CHUNK_SIZE:
+                _write_chunk(snapshot_file, chunk, fields)
+                chunk = []
+        if chunk:
+            _write_chunk(snapshot_file, chunk, fields)
+
+        trailer_offset = snapshot_file.tell()
+        pickle.dump({"count": count}, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
+        snapshot_file.write(_TRAILER_OFFSET.pack(trailer_offset))
+
+    os.replace(temp_path, save_to)
+
+
+def load_snapshot(load_from):
+    """
+    :param load_from: The path of a snapshot file from save_snapshot()
+    :return: A list of ProfileRecords
+    """
+    return list(iter_snapshot(load_from))
+
+
+def load_snapshot_header(load_from):
+    """ Returns the header of a snapshot (including the "count" of profiles), without reading any of its profiles """
+    with open(load_from, "rb") as snapshot_file:
+        return _read_header(snapshot_file, load_from)
+
+
+def iter_snapshot(load_from):
+    """ Yields the ProfileRecords of a snapshot one at a time, reading a single chunk at a time """
+    with open(load_from, "rb") as snapshot_file:
+        header = _read_header(snapshot_file, load_from)
+
+        fields = header["fields"]
+        loaded = 0
+        while loaded < header["count"]:
+            columns = pickle.load(snapshot_file)
+            for row in zip(*(columns[field] for field in fields)):
+                yield ProfileRecord(**dict(zip(fields, row)))
+                loaded += 1
+
+
+def _read_header(snapshot_file, load_from):
+    """ Reads the header, and the count from the trailer, leaving the file at the first chunk """
+    header = pickle.load(snapshot_file)
+    if header["format_version"] not in _READABLE_VERSIONS:
+        raise ValueError("Unsupported snapshot version " + str(header["format_version"]) + " in " + load_from)
+
+    if "count" not in header:
+        chunks_start = snapshot_file.tell()
+        snapshot_file.seek(-_TRAILER_OFFSET.size, os.SEEK_END)
+        trailer_offset, = _TRAILER_OFFSET.unpack(snapshot_file.read(_TRAILER_OFFSET.size))
+        snapshot_file.seek(trailer_offset)
+        header.update(pickle.load(snapshot_file))
+        snapshot_file.seek(chunks_start)
+    return header
+
+
+def _write_chunk(snapshot_file, profiles, fields):
+    # Pickle only writes an object once per dump, so every string is replaced by the first equal string that was seen.
+    # This also turns BeautifulSoup's NavigableStrings into plain strings.
+    strings = {}
+
+    def share(value):
+        if isinstance(value, str):
+            if value not in strings:
+                strings[value] = str(value)
+            return strings[value]
+        if isinstance(value, list):
+            return [share(item) for item in value]
+        return value
+
+    columns = {field: [] for field in fields}
+    for profile in profiles:
+        for field in fields:
+            columns[field].append(share(getattr(profile, field)))
+
+    pickle.dump(columns, snapshot_file, protocol=pickle.HIGHEST_PROTOCOL)
@@ -0,0 +1,197 @@
+"""
+An SQLite database of extracted profile fields, for asking questions like "every profile in industry X with skill Y"
+without loading every profile into memory.
+
+Tables:
+    profiles    id, username, name, current_company, location, connection_count, industry
+    skills      The skills of each profile, in order, along with the skill after clean_feature()
+    companies   The companies of each profile (all_companies), in order
+
+Queries return ProfileRecords.
+"""
+
+import sqlite3
+
+from linkedin.profile_record import ProfileRecord
+from linkedin.sanitization import clean_feature
+
+# How many profiles are read (or looked up by username) per SQL query
+QUERY_BATCH_SIZE = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    name TEXT,
+    current_company TEXT,
+    location TEXT,
+    connection_count INTEGER,
+    industry TEXT
+);
+CREATE TABLE IF NOT EXISTS skills (
+    profile_id INTEGER NOT NULL REFERENCES profiles (id),
+    position INTEGER NOT NULL,
+    skill TEXT,
+    normalized TEXT
+);
+CREATE TABLE IF NOT EXISTS companies (
+    profile_id INTEGER NOT NULL REFERENCES profiles (id),
+    position INTEGER NOT NULL,
+    company TEXT
+);
+CREATE UNIQUE INDEX IF NOT EXISTS profiles_username ON profiles (username);
+CREATE INDEX IF NOT EXISTS profiles_industry ON profiles (industry);
+CREATE INDEX IF NOT EXISTS skills_profile ON skills (profile_id);
+CREATE INDEX IF NOT EXISTS skills_normalized ON skills (normalized);
+CREATE INDEX IF NOT EXISTS companies_profile ON companies (profile_id);
+CREATE INDEX IF NOT EXISTS companies_company ON companies (company);
+"""
+
+_PROFILE_COLUMNS = "id, username, name, current_company, location, connection_count, industry"
+
+
+class ProfileStore:
+    """ An SQLite file of profiles. Profiles are unique by username, adding a username twice keeps the first one. """
+
+    def __init__(self, path):
+        """
+        :param path: The path of the database file. It is created if it doesn't exist.
+        """
+        self.path = path
+
+        # The crawler writes profiles from its own thread
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.executescript(_SCHEMA)
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def __iter__(self):
+        """ Yields every profile in the order it was added, reading QUERY_BATCH_SIZE profiles at a time """
+        last_id = 0
+        while True:
+            rows = self._connection.execute("SELECT " + _PROFILE_COLUMNS + " FROM profiles WHERE id > ? "
+                                            "ORDER BY id LIMIT ?", (last_id, QUERY_BATCH_SIZE)).fetchall()
+            if len(rows) == 0:
+                return
+            yield from self._to_records(rows)
+            last_id = rows[-1][0]
+
+    def close(self):
+        self._connection.close()
+
+    def add_profiles(self, profiles):
+        """
+        Insert profiles in a single transaction. Profiles whose username is already stored are ignored.
+        :param profiles: HTMLProfiles, JSONProfiles or ProfileRecords
+        :return: The number of profiles that were inserted
+        """
+        new_profiles = {}
+        for profile in profiles:
+            if profile.username is not None:
+                new_profiles.setdefault(str(profile.username), profile)
+        for username in self._profile_ids(list(new_profiles)):
+            del new_profiles[username]
+
+        if len(new_profiles) == 0:
+            return 0
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO profiles (username, name, current_company, location, connection_count, industry) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(username, _text(profile.name), _text(profile.current_company), _text(profile.location),
+                  profile.connection_count, _text(profile.industry))
+                 for username, profile in new_profiles.items()])
+
+            profile_ids = self._profile_ids(list(new_profiles))
+            self._connection.executemany(
+                "INSERT INTO skills (profile_id, position, skill, normalized) VALUES (?, ?, ?, ?)",
+                [(profile_ids[username], position, _text(skill), clean_feature(skill))
+                 for username, profile in new_profiles.items()
+                 for position, skill in enumerate(profile.skills)])
+            self._connection.executemany(
+                "INSERT INTO companies (profile_id, position, company) VALUES (?, ?, ?)",
+                [(profile_ids[username], position, _text(company))
+                 for username, profile in new_profiles.items()
+                 for position, company in enumerate(profile.all_companies)])
+
+        return len(new_profiles)
+
+    def has_user(self, username):
+        return self._connection.execute("SELECT 1 FROM profiles WHERE username = ?", (username,)).fetchone() is not None
+
+    def get_profile(self, username):
+        """ Returns the ProfileRecord with this username, or None if there is none """
+        rows = self._connection.execute("SELECT " + _PROFILE_COLUMNS + " FROM profiles WHERE username = ?",
+                                        (username,)).fetchall()
+        records = self._to_records(rows)
+        return records[0] if len(records) else None
+
+    def query(self, industry=None, skill=None, company=None):
+        """
+        Find every profile that matches all of the given conditions. For example, every profile in an industry with a
+        certain skill is query(industry="Computer Software", skill="Python")
+        :param industry: The exact industry of the profile
+        :param skill: A skill of the profile. It's compared after clean_feature(), so "Web Design" matches "web designs"
+        :param company: A company (exactly as written) in the profile's all_companies
+        :return: A list of ProfileRecords, in the order they were added
+        """
+        conditions = []
+        params = []
+        if industry is not None:
+            conditions.append("industry = ?")
+            params.append(industry)
+        if skill is not None:
+            conditions.append("id IN (SELECT profile_id FROM skills WHERE normalized = ?)")
+            params.append(clean_feature(skill))
+        if company is not None:
+            conditions.append("id IN (SELECT profile_id FROM companies WHERE company = ?)")
+            params.append(company)
+
+        sql = "SELECT " + _PROFILE_COLUMNS + " FROM profiles"
+        if len(conditions):
+            sql += " WHERE " + " AND ".join(conditions)
+        rows = self._connection.execute(sql + " ORDER BY id", params).fetchall()
+
+        records = []
+        for start in range(0, len(rows), QUERY_BATCH_SIZE):
+            records += self._to_records(rows[start:start + QUERY_BATCH_SIZE])
+        return records
+
+    def _profile_ids(self, usernames):
+        """ Returns {username: profile id} of the usernames that are stored """
+        profile_ids = {}
+        for start in range(0, len(usernames), QUERY_BATCH_SIZE):
+            batch = usernames[start:start + QUERY_BATCH_SIZE]
+            rows = self._connection.execute("SELECT username, id FROM profiles WHERE username IN (" +
+                                            ", ".join("?" * len(batch)) + ")", batch)
+            profile_ids.update(rows)
+        return profile_ids
+
+    def _to_records(self, profile_rows):
+        """ Turns up to QUERY_BATCH_SIZE rows of the profiles table into ProfileRecords, with skills and companies """
+        profile_ids = [row[0] for row in profile_rows]
+        in_ids = "(" + ", ".join("?" * len(profile_ids)) + ")"
+
+        skills = {profile_id: [] for profile_id in profile_ids}
+        for profile_id, skill in self._connection.execute(
+                "SELECT profile_id, skill FROM skills WHERE profile_id IN " + in_ids + " ORDER BY profile_id, position",
+                profile_ids):
+            skills[profile_id].append(skill)
+
+        companies = {profile_id: [] for profile_id in profile_ids}
+        for profile_id, company in self._connection.execute(
+                "SELECT profile_id, company FROM companies WHERE profile_id IN " + in_ids +
+                " ORDER BY profile_id, position", profile_ids):
+            companies[profile_id].append(company)
+
+        return [ProfileRecord(name=name, username=username, skills=skills[profile_id],
+                              current_company=current_company, all_companies=companies[profile_id],
+                              location=location, connection_count=connection_count, industry=industry)
+                for profile_id, username, name, current_company, location, connection_count, industry in profile_rows]
+
+
+def _text(value):
+    """ sqlite3 can't store BeautifulSoup's NavigableStrings, only plain strings """
+    return None if value is None else str(value)
@@ -1,27 +1,199 @@
-def cache(cache_var):
-    """ This is a semi-confusing decorator saving function for caching variables.
+from time import perf_counter
+from types import MemberDescriptorType
+
+# Whether every CachedField counts its hits, misses and compute time. See enable_cache_stats()
+_stats_enabled = False
+_stats = {}  # {"Class.field": FieldStats}
+
+
+class FieldStats:
+    """ How often a cached field was read, and how long it took to compute """
+    __slots__ = ("hits", "misses", "compute_time")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.compute_time = 0.0  # In seconds, including the time of any other fields it reads
+
+    def __repr__(self):
+        return "FieldStats(hits=%d, misses=%d, compute_time=%.6f)" % (self.hits, self.misses, self.compute_time)
+
+
+class CachedField:
+    """
+    A read-only property that computes its value the first time it is read, and saves it on the instance, so that
+    reading it again costs nothing. Create them with the cached_field() decorator.
+
+    The value is saved in the instance's __dict__ under cache_var (for example "__name"), exactly where the old
+    cache() decorator saved it, so profiles that were pickled before still load their cached values. If the class has
+    a slot called cache_var instead (written in the class as __slots__ = ("__name", ...)), the value is saved in the
+    slot, so the cached fields work on classes with __slots__ as well.
+    """
+
+    def __init__(self, func, cache_var):
+        self.func = func
+        self.cache_var = cache_var
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+        self._slot = None  # The slot of the class that the value is saved in, or None to use the instance __dict__
+        self._stats_key = self.name
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self._stats_key = owner.__name__ + "." + name
+
+        # Names of slots that start with two underscores are mangled, just like attributes
+        for slot_name in (self.cache_var, "_" + owner.__name__.lstrip("_") + self.cache_var):
+            slot = owner.__dict__.get(slot_name)
+            if isinstance(slot, MemberDescriptorType):
+                self._slot = slot
+                break
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+
+        try:
+            value = self._load(instance)
+        except (KeyError, AttributeError):
+            return self._compute(instance, self.func, instance)
+
+        if _stats_enabled:
+            _field_stats(self._stats_key).hits += 1
+        return value
+
+    def __set__(self, instance, value):
+        raise AttributeError("can't set attribute " + repr(self.name) + ", it is computed from the profile")
+
+    def is_cached(self, instance):
+        """ Whether the value was already computed for this instance """
+        try:
+            self._load(instance)
+        except (KeyError, AttributeError):
+            return False
+        return True
+
+    def fill(self, instance, compute):
+        """
+        If the value isn't cached yet, cache the value from compute() instead of computing it with the field's own
+        function. This lets a class compute many fields at once (for example HTMLProfile.extract_all()).
+        :param compute: A function with no arguments that returns the value
+        """
+        if not self.is_cached(instance):
+            self._compute(instance, compute)
+
+    def invalidate(self, instance):
+        """ Forget the cached value of this instance (if there is one), so it is computed again when it is next read """
+        if self._slot is not None:
+            if self.is_cached(instance):
+                self._slot.__delete__(instance)
+        else:
+            instance.__dict__.pop(self.cache_var, None)
+
+    def refresh(self, instance):
+        """ Compute the value of this instance again, and return it """
+        self.invalidate(instance)
+        return self.__get__(instance)
+
+    def _load(self, instance):
+        if self._slot is not None:
+            return self._slot.__get__(instance)
+        return instance.__dict__[self.cache_var]
+
+    def _compute(self, instance, func, *args):
+        if _stats_enabled:
+            start = perf_counter()
+            value = func(*args)
+            stats = _field_stats(self._stats_key)
+            stats.misses += 1
+            stats.compute_time += perf_counter() - start
+        else:
+            value = func(*args)
+
+        if self._slot is not None:
+            self._slot.__set__(instance, value)
+        else:
+            instance.__dict__[self.cache_var] = value
+        return value
+
+
+def cached_field(cache_var):
+    """ This is a decorator that turns a method into a CachedField.
         Usage:
-            @cache("__thing")
+            @cached_field("__thing")
             def thing(self):
                 # Do code to get the result for "thing"
                 return result # the result of the function that you want cached
 
-        This means that cache will AUTOMATICALLY check if self.__thing exists, and if not, it will run get_thing()
-        and save it into self.__thing. Next time thing() is called, it won't have to run get_thing again, since self.__thing
-        already exists. Thus it automatically caches known values.
-
-        :param func_str: A string representation of a getter function from within the class that returns a
-                        value to be cached. So if class A has attribute get_thing(), this argument would be "get_thing"
-        :param cache_var: A string representation of the variable within which to cache the value received from func_str()
-                        For example, if class A wants to save the results from get_thing(), then cache_var might be
-                        "__thing", and will be saved under self.__thing
-    """
-    def _custom_cacher(func_to_wrap):
-        # Wrap func_to_wrap with a function that will get, save, and return the value (or return previously saved value)
-        def wrapper(self):
-            if not hasattr(self, cache_var):
-                setattr(self, cache_var, func_to_wrap(self))
-            return getattr(self, cache_var)
-
-        return wrapper
-    return _custom_cacher
\ No newline at end of file
+        Reading self.thing runs thing() the first time, and saves the result under self.__dict__["__thing"] (or in
+        the "__thing" slot). Next time, the saved value is returned without running thing() again.
+
+        :param cache_var: The name the value is saved under. Keep it the same when changing a field, so that pickled
+        profiles keep their cached values.
+    """
+    def _make_cached_field(func):
+        return CachedField(func, cache_var)
+
+    return _make_cached_field
+
+
+def cached_fields(cls):
+    """ Returns {name: CachedField} of every cached field of a class, including those it inherits """
+    fields = {}
+    for klass in reversed(cls.__mro__):
+        for name, attribute in vars(klass).items():
+            if isinstance(attribute, CachedField):
+                fields[name] = attribute
+    return fields
+
+
+def invalidate(instance, *names):
+    """
+    Forget the cached values of an instance, to free their memory or so that they are computed again
+    :param names: The names of the fields to forget. If none are given, every cached field is forgotten.
+    """
+    fields = cached_fields(type(instance))
+    for name in names or fields:
+        fields[name].invalidate(instance)
+
+
+def refresh(instance, *names):
+    """
+    Compute the cached fields of an instance again
+    :param names: The names of the fields to compute. If none are given, every cached field is computed.
+    :return: {name: new value}
+    """
+    fields = cached_fields(type(instance))
+    return {name: fields[name].refresh(instance) for name in names or fields}
+
+
+def enable_cache_stats(enabled=True):
+    """
+    Start (or stop) counting the hits, misses and compute time of every cached field. This makes every read a little
+    slower, so it is off by default.
+    """
+    global _stats_enabled
+    _stats_enabled = enabled
+
+
+def cache_stats():
+    """ Returns {"Class.field": FieldStats} of every cached field that was read while the stats were enabled """
+    return dict(_stats)
+
+
+def reset_cache_stats():
+    _stats.clear()
+
+
+def print_cache_stats():
+    """ Print the stats of every field, the ones that took the longest to compute first """
+    print("field                            hits   misses   compute s")
+    for key, stats in sorted(_stats.items(), key=lambda item: item[1].compute_time, reverse=True):
+        print("%-30s %6d   %6d   %9.4f" % (key, stats.hits, stats.misses, stats.compute_time))
+
+
+def _field_stats(key):
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = FieldStats()
+    return stats
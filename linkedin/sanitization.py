@@ -1,11 +1,25 @@
+import os
 import re
+from functools import lru_cache
 
+import ujson as json
 from nltk.stem import WordNetLemmatizer
 from nltk.stem.porter import PorterStemmer
 
 lemmetizer = WordNetLemmatizer()
 stemmer = PorterStemmer()
 
+# The maximum amount of entries in the in-process caches of clean_feature()
+PHRASE_CACHE_SIZE = 2 ** 18
+WORD_CACHE_SIZE = 2 ** 16
+
+# The optional on-disk store of raw -> cleaned strings. It is None until load_normalization_cache() is called
+_normalization_store = None
+_normalization_store_path = None  # The file the store was last loaded from
+_store_stats = {"hits": 0, "misses": 0}
+# While recording (see record_normalizations()), {raw: cleaned} of every string that wasn't in the store
+_recorded_normalizations = None
+
 
 def clean_feature(skill):
     """ Given a skill, it will do the following operations on the string
@@ -15,20 +29,36 @@ def clean_feature(skill):
     stem each word
     sort each word alphabetically
     return a string
+
+    Results are cached in memory, and in the normalization store if one was loaded with load_normalization_cache()
     """
 
+    if _normalization_store is None:
+        cleaned = _clean_phrase(skill)
+        if _recorded_normalizations is not None:
+            _recorded_normalizations[skill] = cleaned
+        return cleaned
+
+    cleaned = _normalization_store.get(skill)
+    if cleaned is not None:
+        _store_stats["hits"] += 1
+        return cleaned
+
+    _store_stats["misses"] += 1
+    cleaned = _clean_phrase(skill)
+    _normalization_store[skill] = cleaned
+    if _recorded_normalizations is not None:
+        _recorded_normalizations[skill] = cleaned
+    return cleaned
+
+
+@lru_cache(maxsize=PHRASE_CACHE_SIZE)
+def _clean_phrase(skill):
     lower = skill.lower()
     word_list = lower.split()
 
     # Remove punctuation, lemmetize, and stem the words
-    for i, word in enumerate(word_list):
-        sanitized_word = re.sub("[^a-zA-Z]+", "", word)
-        sanitized_word = lemmetizer.lemmatize(sanitized_word, 'v')
-        sanitized_word = str(stemmer.stem(sanitized_word))
-        word_list[i] = sanitized_word
-
-    # word_list = [lemmetizer.lemmatize(word, 'v') for word in word_list]
-    # word_list = [str(stemmer.stem(word)) for word in word_list]
+    word_list = [_clean_word(word) for word in word_list]
 
     # Alphabetize the order of the words in the string
     word_list.sort()
@@ -37,6 +67,126 @@ def clean_feature(skill):
     return skill
 
 
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def _clean_word(word):
+    sanitized_word = re.sub("[^a-zA-Z]+", "", word)
+    sanitized_word = lemmetizer.lemmatize(sanitized_word, 'v')
+    sanitized_word = str(stemmer.stem(sanitized_word))
+    return sanitized_word
+
+
+def load_normalization_cache(path):
+    """
+    Load a store of raw -> cleaned strings that was saved with save_normalization_cache(), so that clean_feature()
+    doesn't have to run NLTK on any known vocabulary. If the file doesn't exist yet, an empty store is started.
+    Every string cleaned after this is added to the store, and create_features() and append_to_dataset() save the
+    store back to this path when they finish (see save_loaded_normalization_cache()).
+
+    Strings that are cleaned in the worker processes of a multiprocessing Pool are added to that worker's copy of the
+    store (if it has one), which is thrown away with the worker. To keep them, the workers record them (see
+    record_normalizations()) and return them to this process, as create_features() does.
+
+    :param path: The path to a *.json normalization cache
+    :return: The number of known strings that were loaded
+    """
+    global _normalization_store, _normalization_store_path
+
+    if _normalization_store is None:
+        _normalization_store = {}
+    _normalization_store_path = path
+
+    if os.path.isfile(path):
+        with open(path, encoding="utf-8") as cache_file:
+            _normalization_store.update(json.load(cache_file))
+
+    return len(_normalization_store)
+
+
+def normalization_store_loaded():
+    """ Returns True if load_normalization_cache() was called, so cleaned strings are kept in a store """
+    return _normalization_store is not None
+
+
+def record_normalizations():
+    """
+    Start recording every string that clean_feature() cleans, and that wasn't in the normalization store of this
+    process. This is meant for the workers of a multiprocessing Pool: they return the recorded strings from
+    stop_recording_normalizations(), and the main process adds them to its own store with add_normalizations().
+    """
+    global _recorded_normalizations
+    _recorded_normalizations = {}
+
+
+def stop_recording_normalizations():
+    """ :return: {raw: cleaned} of every string that was recorded since record_normalizations() """
+    global _recorded_normalizations
+
+    recorded = _recorded_normalizations if _recorded_normalizations is not None else {}
+    _recorded_normalizations = None
+    return recorded
+
+
+def add_normalizations(normalizations):
+    """
+    Add strings that were cleaned elsewhere (for example in a worker process) to the normalization store
+    :param normalizations: {raw: cleaned}. Nothing is added if no store was loaded.
+    """
+    if _normalization_store is not None:
+        _normalization_store.update(normalizations)
+
+
+def save_normalization_cache(path):
+    """
+    Save every raw -> cleaned string in the normalization store
+    :param path: The path to save the *.json normalization cache to
+    """
+    if _normalization_store is None:
+        raise RuntimeError("There is no normalization store to save! Call load_normalization_cache() first.")
+
+    with open(path, "w", encoding="utf-8") as cache_file:
+        json.dump(_normalization_store, cache_file)
+
+
+def save_loaded_normalization_cache():
+    """
+    Save the normalization store back to the file it was last loaded from, if load_normalization_cache() was called
+    :return: True if the store was saved
+    """
+    if _normalization_store is None or _normalization_store_path is None:
+        return False
+
+    save_normalization_cache(_normalization_store_path)
+    return True
+
+
+def cache_stats():
+    """
+    :return: A dictionary of the hits, misses, and size of every cache used by clean_feature()
+    {"store": {...}, "phrase": {...}, "word": {...}}
+    """
+    phrase_info = _clean_phrase.cache_info()
+    word_info = _clean_word.cache_info()
+
+    return {"store": {"hits": _store_stats["hits"],
+                      "misses": _store_stats["misses"],
+                      "size": 0 if _normalization_store is None else len(_normalization_store)},
+            "phrase": {"hits": phrase_info.hits, "misses": phrase_info.misses, "size": phrase_info.currsize},
+            "word": {"hits": word_info.hits, "misses": word_info.misses, "size": word_info.currsize}}
+
+
+def clear_caches():
+    """ Empties the in-process caches and unloads the normalization store. Nothing on disk is deleted. """
+    global _normalization_store, _normalization_store_path, _recorded_normalizations
+
+    _clean_phrase.cache_clear()
+    _clean_word.cache_clear()
+    _normalization_store = None
+    _normalization_store_path = None
+    _recorded_normalizations = None
+    _store_stats["hits"] = 0
+    _store_stats["misses"] = 0
+
+
 if __name__ == "__main__":
     words = ["management", "manager", "managing", "run", "running", "ran"]
 
@@ -0,0 +1,140 @@
+"""
+Keeps a snapshot (see profile_snapshot) up to date with the profile directories, without re-parsing every file.
+
+Next to the snapshot is a manifest, "<snapshot>.manifest.json", with an entry for each file the snapshot was built from:
+    {"path", "kind", "size", "mtime", "sha256", "count"}
+The entries are in the same order as the records in the snapshot, and "count" is how many records came from each file,
+so the records of any file can be found without storing them twice. The manifest also holds the sha256 and record
+count of the snapshot it describes, so a manifest that doesn't belong to the snapshot next to it (for example after a
+crash between writing the two) is never used.
+
+update_snapshot() only parses files that are new or whose contents changed, drops the records of deleted files, and
+keeps the records of every other file as they were.
+"""
+
+import os
+from hashlib import sha256
+from itertools import islice
+
+import ujson as json
+
+from linkedin.profile_manager import list_profile_files, parse_profile_files
+from linkedin.profile_snapshot import iter_snapshot, load_snapshot_header, save_snapshot
+
+MANIFEST_FORMAT_VERSION = 2
+
+
+def manifest_path(snapshot_path):
+    return snapshot_path + ".manifest.json"
+
+
+def load_manifest(snapshot_path):
+    """
+    :param snapshot_path: The path of a snapshot
+    :return: The list of manifest entries of the snapshot, or [] if the snapshot or its manifest doesn't exist, or if
+    the manifest doesn't match the snapshot
+    """
+    if not os.path.isfile(snapshot_path) or not os.path.isfile(manifest_path(snapshot_path)):
+        return []
+
+    with open(manifest_path(snapshot_path), "r") as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest["format_version"] != MANIFEST_FORMAT_VERSION:
+        print("ERROR: Unsupported manifest version", manifest["format_version"], "the snapshot will be rebuilt")
+        return []
+
+    count = load_snapshot_header(snapshot_path)["count"]
+    if manifest["snapshot_count"] != count or sum(entry["count"] for entry in manifest["files"]) != count or \
+            manifest["snapshot_sha256"] != _file_digest(snapshot_path):
+        print("ERROR: The manifest of", snapshot_path, "doesn't match the snapshot, the snapshot will be rebuilt")
+        return []
+    return manifest["files"]
+
+
+def update_snapshot(snapshot_path, html_dir=None, json_dir=None, workers=1):
+    """
+    Bring a snapshot up to date with the files in the profile directories, or build it if it doesn't exist yet
+    :param snapshot_path: The path of the snapshot. Its manifest is saved next to it.
+    :param html_dir: The location where html profiles are stored
+    :param json_dir: The location where json profiles are stored
+    :param workers: The number of processes to parse the new and changed files with
+    :return: {"parsed": files that were parsed, "reused": files that were unchanged, "removed": deleted files,
+              "profiles": profiles in the updated snapshot}
+    """
+    old_entries = {entry["path"]: entry for entry in load_manifest(snapshot_path)}
+    old_records = _records_by_file(snapshot_path, old_entries.values())
+
+    entries = []
+    to_parse = []
+    for path, kind in list_profile_files(html_dir, json_dir):
+        stat = os.stat(path)
+        entry = {"path": path, "kind": kind, "size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": None}
+
+        old_entry = old_entries.get(path)
+        if old_entry is not None and old_entry["kind"] == kind:
+            # Only hash files whose stats changed, to catch files that were re-written with the same contents
+            if (old_entry["size"], old_entry["mtime"]) == (entry["size"], entry["mtime"]):
+                entry["sha256"] = old_entry["sha256"]
+            else:
+                entry["sha256"] = _file_digest(path)
+
+            if entry["sha256"] == old_entry["sha256"]:
+                entry["count"] = old_entry["count"]
+                entries.append(entry)
+                continue
+
+        to_parse.append((path, kind))
+        entries.append(entry)
+
+    # Parse the new and changed files
+    new_records = {}
+    for path, kind, records in parse_profile_files(to_parse, workers, to_records=True):
+        new_records[path] = list(records)
+
+    records = []
+    for entry in entries:
+        if entry["path"] in new_records:
+            file_records = new_records[entry["path"]]
+            if entry["sha256"] is None:
+                entry["sha256"] = _file_digest(entry["path"])
+        else:
+            file_records = old_records[entry["path"]]
+        entry["count"] = len(file_records)
+        records += file_records
+
+    save_snapshot(records, snapshot_path)
+    temp_path = manifest_path(snapshot_path) + ".tmp"
+    with open(temp_path, "w") as manifest_file:
+        json.dump({"format_version": MANIFEST_FORMAT_VERSION,
+                   "snapshot_sha256": _file_digest(snapshot_path),
+                   "snapshot_count": len(records),
+                   "files": entries}, manifest_file)
+    os.replace(temp_path, manifest_path(snapshot_path))
+
+    current_paths = set(entry["path"] for entry in entries)
+    return {"parsed": len(to_parse),
+            "reused": len(entries) - len(to_parse),
+            "removed": len([path for path in old_entries if path not in current_paths]),
+            "profiles": len(records)}
+
+
+def _records_by_file(snapshot_path, entries):
+    """ Split the records of a snapshot by the file they came from, using the manifest entries """
+    records = {}
+    if len(entries) == 0:
+        return records
+
+    snapshot_records = iter_snapshot(snapshot_path)
+    for entry in entries:
+        records[entry["path"]] = list(islice(snapshot_records, entry["count"]))
+        if len(records[entry["path"]]) != entry["count"]:
+            raise ValueError("The snapshot " + snapshot_path + " has fewer records than its manifest lists")
+    return records
+
+
+def _file_digest(path):
+    digest = sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
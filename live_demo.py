@@ -1,30 +1,34 @@
 import os
-import pickle
 
 from brain import Brain
-from linkedin.html_profile import HTMLProfile
-from linkedin.feature_creation import hot_feature, get_features
+from linkedin.html_profile import load_html_profile
+from linkedin.feature_creation import encode_profile, hot_feature, get_features
+from linkedin.dataset import find_dataset, load_lexicons
+from linkedin.sanitization import load_normalization_cache
 
 import numpy as np
 import tensorflow as tf
 from selenium.webdriver import Chrome as Driver
 
 
-def predict_profile(brain, html, input_lexicon, output_lexicon, input_features, output_feature):
+def predict_profile(brain, html, input_lexicon, output_lexicon, input_features, output_feature, backend="bs4"):
     """
     This class predicts the output for this profile given an inputlexicon, outputlexicon, inputfeatures, outputfeatures
     :param html: A string of html
+    :param input_lexicon: A Lexicon (or list, or FeatureHasher) of the inputs the network was trained on
+    :param output_lexicon: A Lexicon (or list) of the outputs the network was trained on
     :param input_features: A list of strings accepted by get_features
     :param output_feature: A string accepted by get_features
+    :param backend: What the html is parsed with, one of HTML_BACKENDS (see load_html_profile)
     :return:
     """
     print("Starting Analysis...")
 
-    profile = HTMLProfile(html)
+    profile = load_html_profile(html, backend)
     inputs = get_features(profile, input_features)
     output = get_features(profile, [output_feature])
 
-    hot_input = hot_feature(input_lexicon, inputs)
+    hot_input = encode_profile(input_lexicon, profile, input_features)
     hot_expected_out = hot_feature(output_lexicon, output)
 
     predicted = brain.predict(hot_input)
@@ -48,17 +52,20 @@ if __name__ == "__main__":
     tests_dir = "./test_dir/dataset_3"
     checkpoint_path = "2017-10-22-21-44 FEATURES944_LABELS42_LAYERS_4000_4000_4000_LR0.001000_BS1000_NE1000"
     driver_path = "./Resources/chromedriver.exe"
+    html_backend = "lxml"
 
 
+    normalization_cache = "./normalization_cache.json"
+
+    # Skip NLTK for any features that were already cleaned while building the dataset
+    load_normalization_cache(normalization_cache)
+
     # Prepare all the paths
     checkpoint_path = os.path.join(tests_dir, checkpoint_path)
-    dataset_to_load = [pickle_file for pickle_file in os.listdir(tests_dir) if ".pickle" in pickle_file][0]
-    dataset_to_load = os.path.join(tests_dir, dataset_to_load)
+    dataset_to_load = find_dataset(tests_dir)
 
-    # Load the dataset
-    data = pickle.load(open(dataset_to_load, "rb"))
-    input_lexicon = data["input_lexicon"]
-    output_lexicon = data["output_lexicon"]
+    # Load the lexicons of the dataset. For packed datasets this only reads the header.
+    input_lexicon, output_lexicon = load_lexicons(dataset_to_load)
 
     # Open the browser
     browser = Driver(executable_path=driver_path)
@@ -69,6 +76,7 @@ if __name__ == "__main__":
         with Brain(checkpoint_path, output_lexicon) as brain:
             while input("Press any key to start analysis, press 'q' to quit") != "q":
                 html = browser.page_source
-                predict_profile(brain, html, input_lexicon, output_lexicon, ["skills"], "industry")
+                predict_profile(brain, html, input_lexicon, output_lexicon, ["skills"], "industry",
+                                html_backend)
 
     browser.close()
\ No newline at end of file
@@ -1,9 +1,9 @@
 from os.path import join
 import time
 
-import numpy as np
 import tensorflow as tf
-import pickle
+
+from linkedin.dataset import get_batch, get_split, load_dataset, num_samples
 
 all_train_summaries = []
 
@@ -100,8 +100,7 @@ def train_neural_network():
             for step in range(num_steps):
                 start = step * minibatch_size
                 end = (step + 1) * minibatch_size
-                batch_x = np.array(train_inputs[start:end])
-                batch_y = np.array(train_outputs[start:end])
+                batch_x, batch_y = get_batch(data, train_rows[start:end])
 
                 if step % 100 == 0:
                     [_, s] = sess.run([train_accuracy, train_summaries], feed_dict={x: batch_x, y: batch_y})
@@ -137,27 +136,24 @@ if __name__ == "__main__":
     LOGDIR = "..\\test_dir\\dataset_4\\"
 
     print("Loading data...")
-    data = pickle.load(open(LOGDIR + "\\FROM_skills_TO_industry_MININPUTSPER_6_INPUTSAMPLES_125_OUTPUTSAMPLES_3500.pickle", "rb"))
-    print("in: ", len(data["inputs"]),
-          "out: ", len(data["outputs"]),
+    data = load_dataset(LOGDIR + "\\FROM_skills_TO_industry_MININPUTSPER_6_INPUTSAMPLES_125_OUTPUTSAMPLES_3500.pickle")
+    print("samples: ", num_samples(data),
           "in lex", len(data["input_lexicon"]),
           "out lex", len(data["output_lexicon"]))
 
 
-    # Prep the data
-    num_tests = 10000  # Number of test examples
-    train_inputs = data["inputs"][:-num_tests]
-    train_outputs = data["outputs"][:-num_tests]
-    test_inputs = data["inputs"][-num_tests:]
-    test_outputs = data["outputs"][-num_tests:]
+    # Prep the data. The training set is densified one minibatch at a time, inside of train_neural_network()
+    train_rows = get_split(data, "train")
+    num_train = len(train_rows)
+    test_inputs, test_outputs = get_batch(data, get_split(data, "test"))
 
     # Setup characteristics of network:
     node_h1 = 4000
     node_h2 = 4000
     node_h3 = 4000
     # node_h4 = 3500
-    input_shape = np.shape(train_inputs)
-    output_shape = np.shape(train_outputs)
+    input_shape = (num_train, len(data["input_lexicon"]))
+    output_shape = (num_train, len(data["output_lexicon"]))
 
     # Learning
     minibatch_size = 1000
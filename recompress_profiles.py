@@ -0,0 +1,21 @@
+"""
+This module rewrites every profile in the HTML_Profiles directory with a different compression, for example to
+compress a directory that the crawler filled before it compressed new profiles (see linkedin.html_files)
+"""
+
+import os
+from time import time
+
+from linkedin.html_files import recompress_directory
+
+
+if __name__ == "__main__":
+    # Inputs
+    html_dir = os.path.join(os.getcwd(), "Dataset", "HTML_Profiles")
+    compression = "gzip"  # "none", "gzip" or "lzma"
+    level = None
+
+    print("Recompressing all profiles to", compression)
+    start = time()
+    rewritten = recompress_directory(html_dir, compression, level)
+    print("Rewrote", rewritten, "profiles in", time() - start, "seconds")
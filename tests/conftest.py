@@ -0,0 +1,31 @@
+import pytest
+
+from linkedin import sanitization
+
+
+class FakeProfile:
+    """ A profile with only the fields that create_features() reads """
+
+    def __init__(self, number, skills, industry):
+        self.username = "user" + str(number)
+        self.name = "User " + str(number)
+        self.skills = skills
+        self.industry = industry
+        self.current_company = None
+        self.all_companies = []
+        self.location = None
+        self.connection_count = 0
+
+
+@pytest.fixture
+def no_wordnet(monkeypatch):
+    """ Cleans features without the wordnet corpus, which isn't downloaded everywhere the tests run """
+    # The lemmatizer doesn't change the words the tests use
+    class IdentityLemmatizer:
+        def lemmatize(self, word, pos="n"):
+            return word
+
+    monkeypatch.setattr(sanitization, "lemmetizer", IdentityLemmatizer())
+    sanitization.clear_caches()
+    yield
+    sanitization.clear_caches()
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from conftest import FakeProfile
+from linkedin.dataset import load_packed_dataset, load_packed_usernames, num_samples, save_packed_dataset
+from linkedin.dataset_cache import DatasetCache
+from linkedin.feature_creation import append_to_dataset, create_features, make_dataset_name
+
+pytestmark = pytest.mark.usefixtures("no_wordnet")
+
+SKILLS = ["python", "java", "sales", "management", "c++"]
+INDUSTRIES = ["Software", "Finance", "Retail"]
+
+
+def make_profiles(start, count):
+    return [FakeProfile(number, SKILLS[number % 5:number % 5 + 3], INDUSTRIES[number % 3])
+            for number in range(start, start + count)]
+
+
+def test_packed_dataset_keeps_usernames_when_saved_again(tmp_path):
+    profiles = make_profiles(0, 30)
+    data = create_features(profiles, ["skills"], "industry", min_input_samples=0, min_output_samples=0, sparse=True)
+
+    save_packed_dataset(data, str(tmp_path / "first"))
+    loaded = load_packed_dataset(str(tmp_path / "first"))
+    assert loaded["usernames"] == data["usernames"]
+    assert loaded["skipped_usernames"] == data["skipped_usernames"]
+
+    save_packed_dataset(loaded, str(tmp_path / "second"))
+    assert load_packed_usernames(str(tmp_path / "second"), include_skipped=True) == \
+        load_packed_usernames(str(tmp_path / "first"), include_skipped=True)
+
+
+def test_append_after_cache_hit(tmp_path):
+    old_profiles = make_profiles(0, 40)
+    params = dict(input_features=["skills"], output_feature="industry", min_input_samples=0, min_output_samples=0,
+                  sparse=True, save_format="packed", cache_dir=str(tmp_path / "cache"), seed=0)
+
+    first = create_features(old_profiles, save_dir=str(tmp_path / "built"), **params)
+    hit = create_features(old_profiles, save_dir=str(tmp_path / "from_cache"), **params)
+    assert num_samples(hit) == num_samples(first)
+
+    dataset_dir = os.path.join(str(tmp_path / "from_cache"), make_dataset_name(["skills"], "industry", 1, 0, 0))
+    stats = append_to_dataset(dataset_dir, old_profiles + make_profiles(40, 5))
+    assert stats["appended"] == 5
+    assert num_samples(load_packed_dataset(dataset_dir)) == num_samples(first) + 5
+
+
+def test_newest_dataset_is_not_evicted(tmp_path):
+    cache = DatasetCache(str(tmp_path / "cache"), max_bytes=10 ** 6)
+    assert cache.store("old", {"inputs": "x" * 600000})
+    # On a filesystem with a coarse modification time, the old dataset can look just as recent as the new one
+    future = os.stat(cache._pickle_path("old")).st_mtime_ns + 10 ** 12
+    os.utime(cache._pickle_path("old"), ns=(future, future))
+    assert cache.store("new", {"inputs": "x" * 600000})
+
+    assert cache.load("old") is None
+    assert cache.load("new") is not None
+
+
+def test_dataset_larger_than_the_cache_is_not_cached(tmp_path):
+    cache = DatasetCache(str(tmp_path / "cache"), max_bytes=10)
+    assert not cache.store("big", {"inputs": "x" * 100})
+    assert cache.load("big") is None
+    assert os.listdir(str(tmp_path / "cache")) == []
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from linkedin.html_profile import HTML_BACKENDS, HTMLProfile, load_html_profile
+from linkedin.profile_record import ProfileRecord
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "profiles")
+FIXTURES = sorted(file for file in os.listdir(FIXTURES_DIR) if file.endswith(".html"))
+
+# The fields of every fixture, as the properties of HTMLProfile find them one at a time
+EXPECTED = {
+    "top_card.html": {"name": "Alex Example", "username": "alex-example",
+                      "skills": ["python", "project management", "sql"], "current_company": "Initech",
+                      "all_companies": ["Initech", "Globex"], "location": "Greater Example Area",
+                      "connection_count": 500, "industry": "Computer Software"},
+    "legacy_skills.html": {"name": "Sam Sample", "username": "sam-sample",
+                           "skills": ["accounting", "financial analysis", "excel"], "current_company": "Umbrella Corp",
+                           "all_companies": ["Umbrella Corp", "Hooli"], "location": "Sampletown",
+                           "connection_count": 88, "industry": "Accounting"},
+    "headline_fallback.html": {"name": "Taylor Test", "username": "taylor-test", "skills": [],
+                               "current_company": "Vandelay Industries", "all_companies": [], "location": None,
+                               "connection_count": 0, "industry": None},
+    "no_fields.html": {"name": "", "username": None, "skills": [], "current_company": None, "all_companies": [],
+                       "location": None, "connection_count": 0, "industry": None},
+}
+
+
+def read_fixture(fixture):
+    with open(os.path.join(FIXTURES_DIR, fixture), encoding="utf-8") as html_file:
+        return html_file.read()
+
+
+def fields_of(profile):
+    return {field: getattr(profile, field) for field in ProfileRecord.FIELDS}
+
+
+def test_every_fixture_has_expected_fields():
+    assert sorted(EXPECTED) == FIXTURES
+
+
+@pytest.mark.parametrize("fixture", FIXTURES)
+def test_properties_find_expected_fields(fixture):
+    assert fields_of(HTMLProfile(read_fixture(fixture))) == EXPECTED[fixture]
+
+
+@pytest.mark.parametrize("fixture", FIXTURES)
+def test_extract_all_matches_properties(fixture):
+    profile = HTMLProfile(read_fixture(fixture))
+    profile.extract_all()
+    assert fields_of(profile) == EXPECTED[fixture]
+
+
+@pytest.mark.parametrize("backend", HTML_BACKENDS)
+@pytest.mark.parametrize("fixture", FIXTURES)
+def test_backend_matches_properties(fixture, backend):
+    profile = load_html_profile(read_fixture(fixture), backend)
+    assert fields_of(profile) == EXPECTED[fixture]
+
+    # pre_cache_all() goes through extract_all() for the bs4 backends
+    profile = load_html_profile(read_fixture(fixture), backend)
+    profile.pre_cache_all()
+    assert fields_of(profile) == EXPECTED[fixture]
+
+
+@pytest.mark.parametrize("fixture", FIXTURES)
+def test_strained_parse_matches_full_parse(fixture):
+    html = read_fixture(fixture)
+    assert fields_of(HTMLProfile(html, strained=True)) == fields_of(HTMLProfile(html))
+
+
+@pytest.mark.parametrize("fixture", ["top_card.html", "legacy_skills.html"])
+def test_strained_parse_only_keeps_field_tags(fixture):
+    soup = HTMLProfile(read_fixture(fixture), strained=True).soup
+
+    assert soup.find("script") is None and soup.find("style") is None and soup.find("title") is None
+    assert len(soup.find_all("dd", class_="descriptor")) == 2
+    assert len(soup.find_all("link", rel="canonical", href=True)) == 1
+    assert soup.find("dt") is None
@@ -0,0 +1,73 @@
+import pytest
+import ujson as json
+
+from linkedin import json_stream
+from linkedin.json_stream import count_json_objects, iter_json_objects
+
+PROFILES = [{"first-name": "Jane", "skills": ["c++", "sales, marketing"]},
+            {"first-name": "Brace ] { \"quote\"", "skills": []},
+            {"first-name": "Back\\slash", "positions": [{"company": {"name": "Acme"}}]}]
+
+
+def write(tmp_path, text, name="profiles.json"):
+    path = str(tmp_path / name)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+    return path
+
+
+def test_count_matches_iteration(tmp_path, monkeypatch):
+    paths = [write(tmp_path, json.dumps(PROFILES), "array.json"),
+             write(tmp_path, "\n  " + json.dumps(PROFILES, indent=2) + "\n", "indented.json"),
+             write(tmp_path, "\n".join(json.dumps(profile) for profile in PROFILES) + "\n\n", "lines.json"),
+             write(tmp_path, '[1, "a\\\\\\"]", [[], {}], {"b": [1, {"c": "}"}]}, null, "\\\\"]', "mixed.json"),
+             write(tmp_path, " [ ] ", "empty_array.json"),
+             write(tmp_path, "", "empty.json")]
+
+    # Tiny chunks cut every string and number in two
+    for chunk_size in (1, 3, 2 ** 20):
+        monkeypatch.setattr(json_stream, "READ_CHUNK_SIZE", chunk_size)
+        for path in paths:
+            assert count_json_objects(path) == len(list(iter_json_objects(path))), (path, chunk_size)
+
+    assert count_json_objects(paths[0]) == 3
+
+
+def test_numbers_cut_by_a_chunk(tmp_path, monkeypatch):
+    numbers = [-2500.0, 1e-07, 12345678901234567890, 0, 3.25E+10, True, None]
+    path = write(tmp_path, json.dumps(numbers))
+
+    for chunk_size in (1, 2, 3, 7):
+        monkeypatch.setattr(json_stream, "READ_CHUNK_SIZE", chunk_size)
+        assert list(iter_json_objects(path)) == numbers, chunk_size
+
+
+def test_malformed_item_is_reported_without_reading_the_whole_file(tmp_path, monkeypatch):
+    good = json.dumps(PROFILES[0])
+    path = write(tmp_path, "[" + good + ', {"first-name": "Jane" "skills": []}, ' + ", ".join([good] * 1000) + "]")
+    monkeypatch.setattr(json_stream, "READ_CHUNK_SIZE", 64)
+
+    read = []
+    original_open = open
+
+    def counting_open(*args, **kwargs):
+        file = original_open(*args, **kwargs)
+        original_read = file.read
+        file.read = lambda size=-1: read.append(size) or original_read(size)
+        return file
+
+    monkeypatch.setattr(json_stream, "open", counting_open, raising=False)
+    items = iter_json_objects(path)
+    assert next(items) == PROFILES[0]
+    with pytest.raises(ValueError, match="Invalid JSON"):
+        next(items)
+    assert len(read) < 10
+
+
+def test_long_item_stops_at_the_item_limit(tmp_path, monkeypatch):
+    path = write(tmp_path, '[{"first-name": "' + "x" * 10000 + '"}]')
+    monkeypatch.setattr(json_stream, "READ_CHUNK_SIZE", 64)
+    monkeypatch.setattr(json_stream, "MAX_ITEM_CHARS", 1000)
+
+    with pytest.raises(ValueError, match="longer than 1000"):
+        list(iter_json_objects(path))
@@ -0,0 +1,44 @@
+import os
+
+from linkedin.profile_archive import DATA_FILE, INDEX_FILE, ProfileArchive
+
+
+def test_append_after_torn_index_write(tmp_path):
+    archive = ProfileArchive(str(tmp_path), codec="zlib")
+    archive.append("first", "<html>first</html>")
+    archive.close()
+
+    # Simulate a crash while the index line of a second profile was being written
+    with open(os.path.join(str(tmp_path), DATA_FILE), "ab") as data_file:
+        data_file.write(b"partial record")
+    with open(os.path.join(str(tmp_path), INDEX_FILE), "ab") as index_file:
+        index_file.write(b"second\t100\t1")
+
+    archive = ProfileArchive(str(tmp_path), codec="zlib")
+    assert archive.usernames == ["first"]
+    archive.append("third", "<html>third</html>")
+    archive.close()
+
+    reopened = ProfileArchive(str(tmp_path))
+    assert reopened.usernames == ["first", "third"]
+    assert reopened.read("first") == "<html>first</html>"
+    assert reopened.read("third") == "<html>third</html>"
+    reopened.close()
+
+
+def test_index_line_missing_only_its_newline_is_kept(tmp_path):
+    archive = ProfileArchive(str(tmp_path), codec="none")
+    archive.append("first", "<html>first</html>")
+    archive.close()
+
+    index_path = os.path.join(str(tmp_path), INDEX_FILE)
+    with open(index_path, "rb") as index_file:
+        index = index_file.read()
+    with open(index_path, "wb") as index_file:
+        index_file.write(index.rstrip(b"\n"))
+
+    archive = ProfileArchive(str(tmp_path), codec="none")
+    archive.append("second", "<html>second</html>")
+    assert archive.usernames == ["first", "second"]
+    assert archive.read("first") == "<html>first</html>"
+    archive.close()
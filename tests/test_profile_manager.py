@@ -0,0 +1,87 @@
+import os
+import pickle
+
+from linkedin import profile_manager
+from linkedin.dataset_cache import profile_set_digest
+from linkedin.profile_archive import ProfileArchive
+from linkedin.profile_manager import ProfileManager
+from linkedin.profile_record import ProfileRecord
+from linkedin.profile_snapshot import iter_snapshot, load_snapshot_header, save_snapshot
+
+
+def make_records(skill):
+    return [ProfileRecord(name="User " + str(number), username="user" + str(number), skills=[skill])
+            for number in range(3)]
+
+
+def rewrite(path, write):
+    old_mtime = os.stat(path).st_mtime_ns
+    write()
+    # Make sure the rewrite is visible even on filesystems with a coarse modification time
+    os.utime(path, ns=(old_mtime + 10 ** 9, old_mtime + 10 ** 9))
+
+
+def test_digest_changes_when_pickle_changes(tmp_path):
+    path = str(tmp_path / "profiles.pickle")
+    pickle.dump(make_records("python"), open(path, "wb"))
+    before = profile_set_digest(ProfileManager(load_pickle=path))
+
+    rewrite(path, lambda: pickle.dump(make_records("accounting"), open(path, "wb")))
+    assert profile_set_digest(ProfileManager(load_pickle=path)) != before
+
+
+def test_digest_changes_when_snapshot_changes(tmp_path):
+    path = str(tmp_path / "profiles.snapshot")
+    save_snapshot(make_records("python"), path)
+    before = profile_set_digest(ProfileManager(load_snapshot=path))
+    assert profile_set_digest(ProfileManager(load_snapshot=path, stream=True)) == before
+
+    rewrite(path, lambda: save_snapshot(make_records("accounting"), path))
+    assert profile_set_digest(ProfileManager(load_snapshot=path)) != before
+    assert profile_set_digest(ProfileManager(load_snapshot=path, stream=True)) != before
+
+
+def test_snapshot_of_a_stream_that_ends_early(tmp_path):
+    json_dir = tmp_path / "json"
+    json_dir.mkdir()
+    (json_dir / "profiles.json").write_text('[{"public-profile-url": "https://linkedin.com/in/ok1"}, '
+                                            '{"public-profile-url": "https://linkedin.com/in/bad" "x": 1}, '
+                                            '{"public-profile-url": "https://linkedin.com/in/ok2"}]')
+    path = str(tmp_path / "profiles.snapshot")
+    ProfileManager(json_dir=str(json_dir), stream=True).save_snapshot(path)
+
+    assert load_snapshot_header(path)["count"] == 1
+    assert [record.username for record in iter_snapshot(path)] == ["ok1"]
+    assert len(ProfileManager(load_snapshot=path, stream=True)) == 1
+
+
+def test_digest_of_a_stream_parses_nothing(tmp_path, monkeypatch):
+    json_dir = tmp_path / "json"
+    json_dir.mkdir()
+    (json_dir / "profiles.json").write_text('[{"public-profile-url": "https://linkedin.com/in/a"}]')
+    reader = ProfileManager(json_dir=str(json_dir), stream=True)
+
+    def no_parsing(path):
+        raise AssertionError("Parsed " + path)
+
+    monkeypatch.setattr(profile_manager, "iter_json_objects", no_parsing)
+    before = profile_set_digest(reader)
+
+    rewrite(str(json_dir / "profiles.json"),
+            lambda: (json_dir / "profiles.json").write_text('[{"public-profile-url": "https://linkedin.com/in/b"}]'))
+    assert profile_set_digest(ProfileManager(json_dir=str(json_dir), stream=True)) != before
+
+
+def test_stream_looks_up_archived_profiles(tmp_path):
+    fixture = os.path.join(os.path.dirname(__file__), "fixtures", "profiles", "top_card.html")
+    with open(fixture, encoding="utf-8") as html_file:
+        html = html_file.read()
+    archive = ProfileArchive(str(tmp_path / "archive"))
+    archive.append("alex-example", html)
+
+    for backend in ("bs4", "lxml"):
+        manager = ProfileManager(archive=archive, stream=True, backend=backend)
+        assert manager.has_user("alex-example")
+        assert manager.get_profile("alex-example").name == "Alex Example"
+        assert not manager.has_user("nobody")
+        assert manager.get_profile("nobody") is None
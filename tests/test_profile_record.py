@@ -0,0 +1,32 @@
+from linkedin import html_profile
+from linkedin.html_profile import HTMLProfile
+from linkedin.profile_record import ProfileRecord
+
+PROFILE_HTML = """<html><head><link rel="canonical" href="https://www.linkedin.com/in/jdoe"/></head><body>
+<h1 id="name">Jane Doe</h1><span class="locality">Springfield</span>
+<ul><li class="skill">Python</li><li class="skill">Sales</li></ul>
+<ul class="positions"><li><h5 class="item-subtitle">Acme</h5></li></ul>
+<dl><dd class="descriptor">Springfield</dd><dd class="descriptor">Software</dd></dl>
+</body></html>"""
+
+
+def test_to_record_walks_the_html_once(monkeypatch):
+    walks = []
+    find_field_tags = html_profile._find_field_tags
+
+    def counting_find_field_tags(soup):
+        walks.append(soup)
+        return find_field_tags(soup)
+
+    monkeypatch.setattr(html_profile, "_find_field_tags", counting_find_field_tags)
+    record = HTMLProfile(PROFILE_HTML).to_record()
+
+    assert len(walks) == 1
+    assert (record.name, record.username, record.skills) == ("Jane Doe", "jdoe", ["python", "sales"])
+    assert (record.current_company, record.location, record.industry) == ("Acme", "Springfield", "Software")
+
+
+def test_from_profile_copies_a_record():
+    record = ProfileRecord(name="Jane", username="jdoe", skills=["python"])
+    copy = ProfileRecord.from_profile(record)
+    assert (copy.name, copy.username, copy.skills) == ("Jane", "jdoe", ["python"])
@@ -0,0 +1,72 @@
+import pytest
+
+from linkedin import profile_store
+from linkedin.profile_record import ProfileRecord
+from linkedin.profile_store import ProfileStore
+
+pytestmark = pytest.mark.usefixtures("no_wordnet")
+
+
+def make_record(number, industry="Software", skills=("Python",), companies=("Acme",)):
+    return ProfileRecord(name="User " + str(number), username="user" + str(number), skills=list(skills),
+                         current_company=companies[0] if companies else None, all_companies=list(companies),
+                         location="Earth", connection_count=number, industry=industry)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.sqlite"))
+    yield store
+    store.close()
+
+
+def test_add_profiles_skips_stored_and_repeated_usernames(store):
+    assert store.add_profiles([make_record(1), make_record(2), make_record(1, industry="Finance")]) == 2
+    assert store.add_profiles([make_record(2, industry="Finance"), make_record(3), ProfileRecord()]) == 1
+
+    assert len(store) == 3
+    assert store.get_profile("user1").industry == "Software"
+    assert store.get_profile("user2").industry == "Software"
+    assert store.has_user("user3")
+    assert not store.has_user("user4")
+    assert store.get_profile("user4") is None
+    assert store.add_profiles([]) == 0
+
+
+def test_fields_are_stored_in_order(store):
+    record = make_record(7, skills=["Python", "Sales", "C++"], companies=["Acme", "Initech"])
+    store.add_profiles([record])
+
+    loaded = store.get_profile("user7")
+    for field in ProfileRecord.FIELDS:
+        assert getattr(loaded, field) == getattr(record, field), field
+
+
+def test_query(store):
+    store.add_profiles([make_record(1, "Software", ["Python", "Web Design"], ["Acme"]),
+                        make_record(2, "Software", ["Java"], ["Initech", "Acme"]),
+                        make_record(3, "Finance", ["Python"], ["Initech"]),
+                        make_record(4, "Finance", [], [])])
+
+    def usernames(records):
+        return [record.username for record in records]
+
+    assert usernames(store.query()) == ["user1", "user2", "user3", "user4"]
+    assert usernames(store.query(industry="Finance")) == ["user3", "user4"]
+    assert usernames(store.query(skill="python")) == ["user1", "user3"]
+    assert usernames(store.query(skill="web designs")) == ["user1"]
+    assert usernames(store.query(company="Acme")) == ["user1", "user2"]
+    assert usernames(store.query(industry="Software", skill="Python")) == ["user1"]
+    assert usernames(store.query(industry="Finance", company="Initech", skill="Python")) == ["user3"]
+    assert store.query(industry="Retail") == []
+
+
+def test_iteration_and_queries_span_batches(store, monkeypatch):
+    monkeypatch.setattr(profile_store, "QUERY_BATCH_SIZE", 3)
+    records = [make_record(number, skills=["Skill " + str(number)]) for number in range(10)]
+    assert store.add_profiles(records) == 10
+    assert store.add_profiles(records) == 0
+
+    assert [record.username for record in store] == [record.username for record in records]
+    assert [record.skills for record in store] == [record.skills for record in records]
+    assert [record.skills for record in store.query(company="Acme")] == [record.skills for record in records]
@@ -0,0 +1,142 @@
+import pickle
+
+import pytest
+
+from linkedin import profile_utils
+from linkedin.json_profile import JSONProfile
+from linkedin.profile_utils import cache_stats, cached_field, cached_fields, enable_cache_stats, invalidate, refresh, \
+    reset_cache_stats
+
+
+class Counted:
+    """ Counts how many times each field is computed """
+
+    def __init__(self, value):
+        self.value = value
+        self.computed = 0
+
+    @cached_field("__doubled")
+    def doubled(self):
+        self.computed += 1
+        return self.value * 2
+
+    @cached_field("__tripled")
+    def tripled(self):
+        return self.value * 3
+
+
+class Slotted:
+    # The cached values are saved in these slots, whose names are mangled to _Slotted__doubled
+    __slots__ = ("value", "computed", "__doubled")
+
+    def __init__(self, value):
+        self.value = value
+        self.computed = 0
+
+    @cached_field("__doubled")
+    def doubled(self):
+        self.computed += 1
+        return self.value * 2
+
+
+@pytest.fixture
+def stats():
+    reset_cache_stats()
+    enable_cache_stats()
+    yield
+    enable_cache_stats(False)
+    reset_cache_stats()
+
+
+@pytest.mark.parametrize("cls", [Counted, Slotted])
+def test_value_is_computed_once(cls):
+    instance = cls(2)
+    assert instance.doubled == 4
+    assert instance.doubled == 4
+    assert instance.computed == 1
+    assert cls.doubled.is_cached(instance)
+
+
+def test_slotted_values_are_saved_in_the_slot():
+    instance = Slotted(2)
+    assert not hasattr(instance, "__dict__")
+    assert Slotted.doubled._slot is Slotted.__dict__["_Slotted__doubled"]
+
+    instance.doubled
+    assert instance._Slotted__doubled == 4
+
+
+@pytest.mark.parametrize("cls", [Counted, Slotted])
+def test_invalidate_and_refresh(cls):
+    instance = cls(2)
+    instance.doubled
+
+    instance.value = 5
+    assert instance.doubled == 4
+    invalidate(instance)
+    assert not cls.doubled.is_cached(instance)
+    assert instance.doubled == 10
+
+    instance.value = 7
+    assert refresh(instance, "doubled") == {"doubled": 14}
+    assert instance.doubled == 14
+    assert instance.computed == 3
+
+    # Invalidating a value that isn't cached does nothing
+    invalidate(instance)
+    invalidate(instance)
+
+
+def test_invalidate_only_the_named_fields():
+    instance = Counted(1)
+    instance.doubled, instance.tripled
+
+    invalidate(instance, "doubled")
+    assert not Counted.doubled.is_cached(instance)
+    assert Counted.tripled.is_cached(instance)
+    assert sorted(cached_fields(Counted)) == ["doubled", "tripled"]
+
+
+def test_cached_fields_can_not_be_set():
+    with pytest.raises(AttributeError):
+        Counted(1).doubled = 3
+
+
+def test_fill_does_not_replace_a_cached_value():
+    instance = Counted(2)
+    Counted.doubled.fill(instance, lambda: 100)
+    Counted.doubled.fill(instance, lambda: 200)
+    assert instance.doubled == 100
+    assert instance.computed == 0
+
+
+def test_hits_and_misses_are_counted(stats):
+    first, second = Counted(1), Counted(2)
+    first.doubled, first.doubled, first.doubled
+    second.doubled
+    Counted.tripled.fill(first, lambda: 3)
+
+    assert cache_stats()["Counted.doubled"].hits == 2
+    assert cache_stats()["Counted.doubled"].misses == 2
+    assert cache_stats()["Counted.doubled"].compute_time >= 0
+    assert cache_stats()["Counted.tripled"].misses == 1
+
+    reset_cache_stats()
+    assert cache_stats() == {}
+
+
+def test_nothing_is_counted_by_default():
+    assert not profile_utils._stats_enabled
+    Counted(1).doubled
+    assert "Counted.doubled" not in cache_stats()
+
+
+def test_profile_pickled_by_the_old_cache_decorator():
+    # The old cache() decorator saved every value with setattr(self, "__name", value)
+    profile = JSONProfile({"first-name": "New", "last-name": "Name"})
+    setattr(profile, "__name", "Old Name")
+    loaded = pickle.loads(pickle.dumps(profile))
+
+    assert loaded.name == "Old Name"
+    assert JSONProfile.name.is_cached(loaded)
+    assert refresh(loaded, "name") == {"name": "New Name"}
@@ -0,0 +1,28 @@
+import pytest
+import ujson as json
+
+from conftest import FakeProfile
+from linkedin import sanitization
+from linkedin.feature_creation import create_features
+
+pytestmark = pytest.mark.usefixtures("no_wordnet")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_create_features_saves_the_normalization_cache(tmp_path, workers):
+    path = str(tmp_path / "normalization_cache.json")
+    with open(path, "w", encoding="utf-8") as cache_file:
+        json.dump({"Known Skill": "known skill"}, cache_file)
+
+    assert sanitization.load_normalization_cache(path) == 1
+    profiles = [FakeProfile(number, ["Python", "Sales"], "Software") for number in range(5)]
+    create_features(profiles, ["skills"], "industry", min_input_samples=0, min_output_samples=0, workers=workers)
+
+    with open(path, encoding="utf-8") as cache_file:
+        saved = json.load(cache_file)
+    assert saved["Known Skill"] == "known skill"
+    assert {"Python", "Sales", "Software"} <= set(saved)
+
+
+def test_nothing_is_saved_without_a_loaded_cache():
+    assert not sanitization.save_loaded_normalization_cache()
@@ -0,0 +1,53 @@
+import os
+import shutil
+
+import ujson as json
+
+from linkedin.profile_snapshot import iter_snapshot
+from linkedin.snapshot_manifest import load_manifest, update_snapshot
+
+
+def write_profiles(json_dir, name, usernames):
+    profiles = [{"public-profile-url": "https://www.linkedin.com/in/" + username, "first-name": username,
+                 "skills": ["python"], "industry": "Software"} for username in usernames]
+    with open(os.path.join(json_dir, name), "w") as json_file:
+        json.dump(profiles, json_file)
+
+
+def snapshot_usernames(snapshot_path):
+    return [record.username for record in iter_snapshot(snapshot_path)]
+
+
+def test_reuses_unchanged_files(tmp_path):
+    json_dir = str(tmp_path / "json")
+    os.makedirs(json_dir)
+    write_profiles(json_dir, "a.json", ["a1", "a2"])
+    write_profiles(json_dir, "b.json", ["b1"])
+    snapshot_path = str(tmp_path / "profiles.snapshot")
+
+    assert update_snapshot(snapshot_path, json_dir=json_dir)["parsed"] == 2
+    stats = update_snapshot(snapshot_path, json_dir=json_dir)
+    assert (stats["parsed"], stats["reused"], stats["profiles"]) == (0, 2, 3)
+    assert sorted(snapshot_usernames(snapshot_path)) == ["a1", "a2", "b1"]
+
+
+def test_stale_manifest_is_not_used(tmp_path):
+    json_dir = str(tmp_path / "json")
+    os.makedirs(json_dir)
+    write_profiles(json_dir, "a.json", ["a1", "a2"])
+    write_profiles(json_dir, "b.json", ["b1"])
+    snapshot_path = str(tmp_path / "profiles.snapshot")
+    update_snapshot(snapshot_path, json_dir=json_dir)
+    old_manifest = str(tmp_path / "old.manifest.json")
+    shutil.copy(snapshot_path + ".manifest.json", old_manifest)
+
+    # Crash after the new snapshot was written, but before its manifest was
+    write_profiles(json_dir, "a.json", ["a1", "a2", "a3"])
+    update_snapshot(snapshot_path, json_dir=json_dir)
+    shutil.copy(old_manifest, snapshot_path + ".manifest.json")
+    assert load_manifest(snapshot_path) == []
+
+    write_profiles(json_dir, "b.json", ["b2"])
+    stats = update_snapshot(snapshot_path, json_dir=json_dir)
+    assert stats["parsed"] == 2
+    assert sorted(snapshot_usernames(snapshot_path)) == ["a1", "a2", "a3", "b2"]